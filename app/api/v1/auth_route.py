@@ -1,27 +1,52 @@
 import logging
 import secrets
 from typing import Optional
+from urllib.parse import quote, urlencode
 
-from fastapi import APIRouter, Depends, HTTPException, Request, status
+import httpx
+import jwt
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
 from fastapi.responses import RedirectResponse
-from google.auth.transport import requests
-from google.oauth2 import id_token
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
 
 from app.core.config import settings
+from app.core.google_oauth import verify_google_id_token
+from app.core.http_client import get_http_client
 from app.core.security import create_access_token
 from app.db.session import get_db
 from app.models.user import User
 from app.models.wallet import Wallet
 from app.schemas.user import AuthResponse, UserCreate, UserResponse
-from app.utils.wallet import generate_unique_wallet_number
+from app.utils.wallet import create_user_wallet
 
 # Set up logger
 logger = logging.getLogger(__name__)
 
 auth_router = APIRouter()
 
+# OAuth settings never change at runtime
+GOOGLE_CLIENT_ID = settings.google_client_id
+GOOGLE_CLIENT_SECRET = settings.google_client_secret
+GOOGLE_REDIRECT_URI = settings.google_redirect_uri
+
+
+GOOGLE_AUTH_BASE_URL = "https://accounts.google.com/o/oauth2/auth"
+
+# Query parameters that never change between requests, encoded once at import
+_STATIC_GOOGLE_PARAMS = urlencode(
+    {
+        "client_id": GOOGLE_CLIENT_ID,
+        "redirect_uri": GOOGLE_REDIRECT_URI,
+        "scope": "openid email profile",
+        "response_type": "code",
+        "access_type": "offline",
+        "prompt": "consent",
+    },
+    quote_via=quote,
+)
+_GOOGLE_AUTH_URL_PREFIX = f"{GOOGLE_AUTH_BASE_URL}?{_STATIC_GOOGLE_PARAMS}&state="
+
 
 def _get_google_auth_url(state: str) -> str:
     """
@@ -33,18 +58,7 @@ def _get_google_auth_url(state: str) -> str:
     Returns:
         str: Google OAuth URL.
     """
-    base_url = "https://accounts.google.com/o/oauth2/auth"
-    params = {
-        "client_id": settings.google_client_id,
-        "redirect_uri": settings.google_redirect_uri,
-        "scope": "openid email profile",
-        "response_type": "code",
-        "state": state,
-        "access_type": "offline",
-        "prompt": "consent",
-    }
-    query_string = "&".join(f"{k}={v}" for k, v in params.items())
-    return f"{base_url}?{query_string}"
+    return _GOOGLE_AUTH_URL_PREFIX + quote(state)
 
 
 @auth_router.get("/google", response_class=RedirectResponse)
@@ -54,7 +68,7 @@ async def google_auth():
 
     Generates state token for CSRF protection and redirects to Google.
     """
-    if not settings.google_client_id:
+    if not GOOGLE_CLIENT_ID:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Google OAuth2 not configured",
@@ -63,9 +77,10 @@ async def google_auth():
     # Generate random state for CSRF protection
     state = secrets.token_urlsafe(32)
 
-    # Redirect to Google OAuth
+    # Redirect to Google OAuth; the URL is already encoded, so skip
+    # RedirectResponse's re-quoting of the whole Location header
     auth_url = _get_google_auth_url(state)
-    return RedirectResponse(url=auth_url, status_code=302)
+    return Response(status_code=status.HTTP_302_FOUND, headers={"location": auth_url})
 
 
 @auth_router.get("/google/callback", response_model=AuthResponse)
@@ -98,7 +113,7 @@ async def google_auth_callback(
             status_code=status.HTTP_400_BAD_REQUEST, detail="Authorization code missing"
         )
 
-    if not settings.google_client_id or not settings.google_client_secret:
+    if not GOOGLE_CLIENT_ID or not GOOGLE_CLIENT_SECRET:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Google OAuth2 not properly configured",
@@ -106,21 +121,19 @@ async def google_auth_callback(
 
     try:
         # Get access token from authorization code
-        import httpx
-
         token_url = "https://oauth2.googleapis.com/token"
         token_data = {
-            "client_id": settings.google_client_id,
-            "client_secret": settings.google_client_secret,
+            "client_id": GOOGLE_CLIENT_ID,
+            "client_secret": GOOGLE_CLIENT_SECRET,
             "code": code,
             "grant_type": "authorization_code",
-            "redirect_uri": settings.google_redirect_uri,
+            "redirect_uri": GOOGLE_REDIRECT_URI,
         }
 
-        async with httpx.AsyncClient() as client:
-            token_response = await client.post(token_url, data=token_data)
-            token_response.raise_for_status()
-            token_info = token_response.json()
+        client = get_http_client()
+        token_response = await client.post(token_url, data=token_data)
+        token_response.raise_for_status()
+        token_info = token_response.json()
 
         # Verify ID token
         id_token_value = token_info.get("id_token")
@@ -130,14 +143,9 @@ async def google_auth_callback(
                 detail="ID token missing from response",
             )
 
-        # Verify the ID token with Google's servers
-        # Add clock tolerance for development environments
-        request_obj = requests.Request()
-        id_info = id_token.verify_oauth2_token(
-            id_token_value,
-            request_obj,
-            settings.google_client_id,
-            clock_skew_in_seconds=10,
+        # Verify the ID token locally against Google's cached signing keys
+        id_info = await verify_google_id_token(
+            id_token_value, access_token=token_info.get("access_token")
         )
 
         # Extract user info from verified token
@@ -146,11 +154,16 @@ async def google_auth_callback(
         name = id_info.get("name")
         picture = id_info.get("picture")
 
-        logger.info(f"OAuth callback for user with Google sub: {google_sub}")
+        logger.info("OAuth callback for user with Google sub: %s", google_sub)
 
-        # Check if user exists
-        result = await db.execute(select(User).where(User.google_sub == google_sub))
-        user = result.scalars().first()
+        # Fetch user and wallet in a single round-trip
+        result = await db.execute(
+            select(User, Wallet)
+            .outerjoin(Wallet, Wallet.user_id == User.id)
+            .where(User.google_sub == google_sub)
+        )
+        row = result.first()
+        user, wallet = row if row else (None, None)
 
         if not user:
             # Create new user
@@ -159,55 +172,36 @@ async def google_auth_callback(
             )
             user = User(**user_data.model_dump())
             db.add(user)
-            await db.commit()
-            await db.refresh(user)
-            logger.info(f"Created new user: {user.id}")
+            await db.flush()
 
-            # Auto-create wallet for new user
-            wallet_number = await generate_unique_wallet_number(db)
-            wallet = Wallet(user_id=user.id, wallet_number=wallet_number)
-            db.add(wallet)
+            # Auto-create wallet for new user in the same transaction
+            wallet = await create_user_wallet(db, user.id)
             await db.commit()
-            await db.refresh(wallet)
-            logger.info(f"Auto-created wallet {wallet_number} for user: {user.id}")
+            logger.info("Created new user %s with wallet %s", user.id, wallet.wallet_number)
 
         else:
-            logger.info(f"Found existing user: {user.id}")
-
-            # Check if user has wallet
-            result = await db.execute(select(Wallet).where(Wallet.user_id == user.id))
-            wallet = result.scalars().first()
+            logger.info("Found existing user: %s", user.id)
 
             if not wallet:
                 # Auto-create wallet for existing user without one
-                wallet_number = await generate_unique_wallet_number(db)
-                wallet = Wallet(user_id=user.id, wallet_number=wallet_number)
-                db.add(wallet)
+                wallet = await create_user_wallet(db, user.id)
                 await db.commit()
-                await db.refresh(wallet)
                 logger.info(
-                    f"Auto-created wallet {wallet_number} for existing user: {user.id}"
+                    "Auto-created wallet %s for existing user: %s",
+                    wallet.wallet_number, user.id,
                 )
 
         # Create JWT token
-        jwt_token = create_access_token(data={"sub": user.google_sub})
-
-        # Convert SQLAlchemy model to dict for Pydantic validation
-        user_dict = {
-            "id": user.id,
-            "google_sub": user.google_sub,
-            "email": user.email,
-            "name": user.name,
-            "picture": user.picture,
-            "created_at": user.created_at,
-        }
+        jwt_token = create_access_token(
+            data={"sub": user.google_sub, "uid": str(user.id), "email": user.email}
+        )
 
         # Return auth response
-        user_response = UserResponse.model_validate(user_dict)
-        logger.info(f"Successfully issued JWT token for user: {user.id}")
+        user_response = UserResponse.model_validate(user)
+        logger.info("Successfully issued JWT token for user: %s", user.id)
         return AuthResponse(access_token=jwt_token, user=user_response)
 
-    except Exception as e:
+    except (httpx.HTTPError, jwt.PyJWTError, KeyError, ValueError) as e:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=f"OAuth verification failed: {str(e)}",
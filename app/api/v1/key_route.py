@@ -9,6 +9,8 @@ from typing import List
 from uuid import UUID
 
 from fastapi import APIRouter, Depends, HTTPException
+from pydantic import TypeAdapter
+from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.db.session import get_db
@@ -31,6 +33,9 @@ logger = logging.getLogger(__name__)
 
 keys_router = APIRouter()
 
+# Built once; validates a whole list of ORM keys in a single call
+_api_key_list_adapter = TypeAdapter(List[APIKeyResponse])
+
 
 @keys_router.post("/create", response_model=APIKeyCreateResponse)
 async def create_api_key(
@@ -61,21 +66,12 @@ async def create_api_key(
         )
 
        
-        key_response = APIKeyResponse(
-            id=api_key.id,
-            name=api_key.name,
-            permissions=api_key.permissions,
-            expires_at=api_key.expires_at,
-            revoked=api_key.revoked,
-            revoked_at=api_key.revoked_at,
-            last_used_at=api_key.last_used_at,
-            created_at=api_key.created_at
-        )
+        key_response = APIKeyResponse.model_validate(api_key)
 
         return APIKeyCreateResponse(key=key_response, secret=plain_key)
 
-    except Exception as e:
-        logger.error(f"Failed to create API key for user {current_user.id}: {e}")
+    except SQLAlchemyError as e:
+        logger.error("Failed to create API key for user %s: %s", current_user.id, e)
         raise
 
 
@@ -106,22 +102,12 @@ async def rollover_api_key(
             db=db
         )
 
-        # Convert to response format
-        key_response = APIKeyResponse(
-            id=api_key.id,
-            name=api_key.name,
-            permissions=api_key.permissions,
-            expires_at=api_key.expires_at,
-            revoked=api_key.revoked,
-            revoked_at=api_key.revoked_at,
-            last_used_at=api_key.last_used_at,
-            created_at=api_key.created_at
-        )
+        key_response = APIKeyResponse.model_validate(api_key)
 
         return APIKeyCreateResponse(key=key_response, secret=plain_key)
 
-    except Exception as e:
-        logger.error(f"Failed to rollover API key for user {current_user.id}: {e}")
+    except SQLAlchemyError as e:
+        logger.error("Failed to rollover API key for user %s: %s", current_user.id, e)
         raise
 
 
@@ -150,17 +136,7 @@ async def revoke_api_key(
             db=db
         )
 
-        # Convert to response format
-        key_response = APIKeyResponse(
-            id=api_key.id,
-            name=api_key.name,
-            permissions=api_key.permissions,
-            expires_at=api_key.expires_at,
-            revoked=api_key.revoked,
-            revoked_at=api_key.revoked_at,
-            last_used_at=api_key.last_used_at,
-            created_at=api_key.created_at
-        )
+        key_response = APIKeyResponse.model_validate(api_key)
 
         return APIKeyRevokeResponse(
             message="API key revoked successfully",
@@ -169,8 +145,8 @@ async def revoke_api_key(
 
     except ValueError:
         raise HTTPException(status_code=400, detail="Invalid key ID format")
-    except Exception as e:
-        logger.error(f"Failed to revoke API key {key_id}: {e}")
+    except SQLAlchemyError as e:
+        logger.error("Failed to revoke API key %s: %s", key_id, e)
         raise
 
 
@@ -192,25 +168,12 @@ async def list_api_keys(
     try:
         api_keys = await APIKeyService.get_user_api_keys(current_user.id, db)
 
-        # Convert to response format
-        keys_response = []
-        for key in api_keys:
-            key_response = APIKeyResponse(
-                id=key.id,
-                name=key.name,
-                permissions=key.permissions,
-                expires_at=key.expires_at,
-                revoked=key.revoked,
-                revoked_at=key.revoked_at,
-                last_used_at=key.last_used_at,
-                created_at=key.created_at
-            )
-            keys_response.append(key_response)
+        keys_response = _api_key_list_adapter.validate_python(api_keys)
 
         return APIKeyListResponse(keys=keys_response)
 
-    except Exception as e:
-        logger.error(f"Failed to list API keys for user {current_user.id}: {e}")
+    except SQLAlchemyError as e:
+        logger.error("Failed to list API keys for user %s: %s", current_user.id, e)
         raise
 
 
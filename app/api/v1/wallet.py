@@ -1,13 +1,18 @@
 import logging
 from decimal import Decimal
-from typing import Dict, Any
+from typing import Dict, Any, List
 
-from fastapi import APIRouter, Depends, HTTPException, Request, status
+import orjson
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Request, status
+from fastapi.responses import ORJSONResponse
+from pydantic import TypeAdapter
+from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.config import settings
-from app.db.session import get_db
-from app.dependencies.auth import get_current_user
+from app.core.paystack import PaystackError
+from app.db.session import AsyncSessionLocal, get_db
+from app.dependencies.auth import get_auth_user, get_wallet_write_user
 from app.models.user import User
 from app.schemas.wallet_schemas import (
     BalanceResponse,
@@ -18,32 +23,37 @@ from app.schemas.wallet_schemas import (
     TransactionHistoryResponse,
     TransactionResponse,
 )
-from app.services.api_key_service import APIKeyService
 from app.services.paystack_service import PaystackService
 from app.services.transfer_service import TransferService
 from app.utils.paystack_webhook import verify_paystack_webhook_signature
+from app.utils.wallet import create_user_wallet, format_wallet_balance
 
 
 logger = logging.getLogger(__name__)
 
 wallet_router = APIRouter()
 
+# Built once; validates a whole page of ORM transactions in a single call
+_transaction_list_adapter = TypeAdapter(List[TransactionResponse])
+
 
 @wallet_router.post("/deposit", response_model=DepositResponse)
 async def initiate_deposit(
     deposit_data: DepositRequest,
     request: Request,
+    auth_user: User = Depends(get_wallet_write_user),
     db: AsyncSession = Depends(get_db),
 ):
     """
     Initialize a wallet deposit using Paystack.
 
-    Supports both JWT and API key authentication.
+    Supports both JWT and API key authentication (wallet:write required).
     Creates a pending transaction and returns Paystack authorization URL.
 
     Args:
         deposit_data: Deposit request with amount.
-        request: HTTP request for auth detection.
+        request: HTTP request used to build the callback URL.
+        auth_user: Authenticated user.
         db: Database session.
 
     Returns:
@@ -52,118 +62,13 @@ async def initiate_deposit(
     Raises:
         HTTPException: For validation errors or Paystack failures.
     """
-    auth_user = None
-
-    # Debug: Log authentication attempt
-    logger.info(f"Deposit auth attempt - API key: {'x-api-key' in request.headers}, JWT: {'authorization' in request.headers}")
-
-    # Check for API key authentication first
-    if request.headers.get("x-api-key"):
-        logger.info("Attempting API key authentication")
-        try:
-            api_key = request.headers.get("x-api-key")
-            api_key_obj, api_key_user = await APIKeyService.validate_api_key(api_key, db)
-            if not api_key_user or not api_key_obj:
-                logger.warning("API key validation failed - invalid key or user")
-                raise HTTPException(
-                    status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid API key"
-                )
-            if "wallet:write" not in api_key_obj.permissions:
-                logger.warning("API key missing wallet:write permission")
-                raise HTTPException(
-                    status_code=status.HTTP_403_FORBIDDEN,
-                    detail="API key does not have wallet:write permission",
-                )
-            auth_user = api_key_user
-            logger.info(f"API key auth successful for user: {auth_user.id}")
-        except HTTPException:
-            raise
-        except Exception as e:
-            logger.error(f"API key auth error: {e}")
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED, detail="API key authentication failed"
-            )
-    else:
-        logger.info("Attempting JWT authentication")
-        # Use JWT authentication
-        try:
-            # Extract auth header
-            auth_header = request.headers.get("authorization")
-            if not auth_header:
-                logger.warning("Missing authorization header")
-                raise HTTPException(
-                    status_code=status.HTTP_401_UNAUTHORIZED, detail="Authentication required"
-                )
-            if not auth_header.startswith("Bearer "):
-                logger.warning("Authorization header doesn't start with Bearer")
-                raise HTTPException(
-                    status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid authorization format"
-                )
-
-            # Get token from auth header
-            token = auth_header[7:]  
-            if not token:
-                logger.warning("Empty JWT token")
-                raise HTTPException(
-                    status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token"
-                )
-
-            from app.core.security import verify_token
-            token_data = verify_token(token)
-            user_sub = token_data.get("sub")
-
-            if not user_sub:
-                logger.warning("Missing sub claim in JWT")
-                raise HTTPException(
-                    status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token"
-                )
-
-            # Get user from database
-            from sqlalchemy.future import select
-            from app.models.user import User
-            result = await db.execute(
-                select(User).where(User.google_sub == user_sub)
-            )
-            auth_user = result.scalars().first()
-
-            if not auth_user:
-                logger.warning(f"User not found for Google sub: {user_sub}")
-                raise HTTPException(
-                    status_code=status.HTTP_401_UNAUTHORIZED, detail="User not found"
-                )
-
-            logger.info(f"JWT auth successful for user: {auth_user.id}")
-
-        except HTTPException:
-            raise
-        except Exception as e:
-            logger.error(f"JWT authentication error: {e}")
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid authentication"
-            )
-
     try:
-        # Check if user has wallet, create if needed
-        from sqlalchemy.future import select
-        from app.models.wallet import Wallet
-        from app.utils.wallet import generate_unique_wallet_number
-
-        user_wallet = await db.execute(
-            select(Wallet).where(Wallet.user_id == auth_user.id)
-        )
-        wallet = user_wallet.scalars().first()
-
-        if not wallet:
-            logger.info(f"Auto-creating wallet for user {auth_user.id}")
-            wallet_number = await generate_unique_wallet_number(db)
-            wallet = Wallet(
-                user_id=auth_user.id,
-                wallet_number=wallet_number
-            )
-            db.add(wallet)
+        # Create wallet if the user doesn't have one yet
+        if not auth_user.wallet:
+            logger.info("Auto-creating wallet for user %s", auth_user.id)
+            wallet = await create_user_wallet(db, auth_user.id)
             await db.commit()
-            await db.refresh(wallet)
-            logger.info(f"Auto-created wallet {wallet_number} for user {auth_user.id}")
+            logger.info("Auto-created wallet %s for user %s", wallet.wallet_number, auth_user.id)
 
         # Initialize deposit with Paystack
         paystack_response = await PaystackService.initialize_deposit(
@@ -184,12 +89,12 @@ async def initiate_deposit(
                 detail="Failed to get Paystack payment details",
             )
 
-        user_id = getattr(auth_user, "id", "unknown")
         logger.info(
-            f"Deposit initiated for user {user_id}: ₦{deposit_data.amount}, ref: {reference}"
+            "Deposit initiated for user %s: ₦%s, ref: %s",
+            auth_user.id, deposit_data.amount, reference,
         )
 
-        return DepositResponse(
+        return DepositResponse.model_construct(
             transaction_id=reference,
             reference=reference,
             authorization_url=auth_url,
@@ -197,126 +102,61 @@ async def initiate_deposit(
             message="Deposit initiated successfully. Complete payment via the authorization URL.",
         )
 
-    except HTTPException:
-        raise
-    except Exception as e:
-        user_id = getattr(auth_user, "id", "unknown")
-        logger.error(f"Deposit initiation failed for user {user_id}: {e}")
+    except (ValueError, PaystackError) as e:
+        logger.error("Deposit initiation failed for user %s: %s", auth_user.id, e)
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
 
 
 @wallet_router.get("/balance", response_model=BalanceResponse)
 async def get_wallet_balance(
-    request: Request,
-    db: AsyncSession = Depends(get_db)
+    auth_user: User = Depends(get_auth_user)
 ):
     """
     Get current user's wallet balance.
 
     Supports both JWT and API key authentication.
-    Loads user's wallet directly to avoid relationship issues.
+    The wallet is loaded together with the authenticated user.
 
     Args:
-        request: HTTP request for auth detection.
-        db: Database session.
+        auth_user: Authenticated user.
 
     Returns:
         BalanceResponse: Wallet balance information.
 
     Raises:
-        HTTPException: If user has no wallet or auth fails.
+        HTTPException: If user has no wallet.
     """
-    # Get authenticated user using same logic as deposit endpoint
-    auth_user = None
-
-    # Check for API key authentication first
-    if request.headers.get("x-api-key"):
-        api_key_obj, api_key_user = await APIKeyService.validate_api_key(request.headers.get("x-api-key"), db)
-        if not api_key_user or not api_key_obj:
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid API key"
-            )
-        auth_user = api_key_user
-    else:
-        # Use JWT authentication
-        auth_header = request.headers.get("authorization")
-        if not auth_header or not auth_header.startswith("Bearer "):
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED, detail="Authentication required"
-            )
-
-        token = auth_header[7:]  # Remove "Bearer " 
-        from app.core.security import verify_token
-        token_data = verify_token(token)
-        user_sub = token_data.get("sub")
-
-        if not user_sub:
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token"
-            )
-
-        # Get user from database
-        from sqlalchemy.future import select
-        from app.models.user import User
-        result = await db.execute(
-            select(User).where(User.google_sub == user_sub)
-        )
-        auth_user = result.scalars().first()
+    wallet = auth_user.wallet
 
-        if not auth_user:
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED, detail="User not found"
-            )
-
-    try:
-        # Get wallet directly (avoid relationship loading issues)
-        from sqlalchemy.future import select
-        from app.models.wallet import Wallet
-
-        wallet_result = await db.execute(
-            select(Wallet).where(Wallet.user_id == auth_user.id)
-        )
-        wallet = wallet_result.scalars().first()
-
-        if not wallet:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Wallet not found. Please contact support.",
-            )
-
-        return BalanceResponse(
-            wallet_number=wallet.wallet_number,
-            balance=f"{wallet.balance:.2f}",
-            currency="NGN",
-            is_active=wallet.is_active,
-        )
-
-    except HTTPException:
-        raise
-    except Exception as e:
-        user_id = getattr(auth_user, "id", "unknown")
-        logger.error(f"Failed to get balance for user {user_id}: {e}")
+    if not wallet:
         raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail="Unable to retrieve wallet balance",
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Wallet not found. Please contact support.",
         )
 
+    return BalanceResponse.model_construct(
+        wallet_number=wallet.wallet_number,
+        balance=format_wallet_balance(wallet.balance),
+        currency="NGN",
+        is_active=wallet.is_active,
+    )
+
 
 @wallet_router.post("/transfer", response_model=TransferResponse)
 async def transfer_funds(
     transfer_data: TransferRequest,
-    request: Request,
+    auth_user: User = Depends(get_wallet_write_user),
     db: AsyncSession = Depends(get_db)
 ):
     """
     Transfer funds between wallets.
 
-    Supports both JWT and API key authentication.
+    Supports both JWT and API key authentication (wallet:write required).
     Uses atomic database transactions for consistency.
 
     Args:
         transfer_data: Transfer request with recipient and amount.
-        request: HTTP request for auth detection.
+        auth_user: Authenticated user.
         db: Database session.
 
     Returns:
@@ -325,63 +165,11 @@ async def transfer_funds(
     Raises:
         HTTPException: For validation errors or transfer failures.
     """
-    # Get authenticated user
-    auth_user = None
-
-    if request.headers.get("x-api-key"):
-        api_key_obj, api_key_user = await APIKeyService.validate_api_key(request.headers.get("x-api-key"), db)
-        if not api_key_user or not api_key_obj:
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid API key"
-            )
-        if "wallet:write" not in api_key_obj.permissions:
-            raise HTTPException(
-                status_code=status.HTTP_403_FORBIDDEN,
-                detail="API key does not have wallet:write permission",
-            )
-        auth_user = api_key_user
-    else:
-        auth_header = request.headers.get("authorization")
-        if not auth_header or not auth_header.startswith("Bearer "):
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED, detail="Authentication required"
-            )
-
-        token = auth_header[7:]
-        from app.core.security import verify_token
-        token_data = verify_token(token)
-        if not token_data:
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid or expired JWT token"
-            )
-
-        user_sub = token_data.get("sub")
-        if not user_sub:
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token payload"
-            )
-
-        from sqlalchemy.future import select
-        from app.models.user import User
-        result = await db.execute(
-            select(User).where(User.google_sub == user_sub)
-        )
-        auth_user = result.scalars().first()
-
-        if not auth_user:
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED, detail="User not found"
-            )
+    # A failed transfer rolls back the session, expiring auth_user
+    user_id = auth_user.id
 
     try:
-        # Get sender wallet
-        from sqlalchemy.future import select
-        from app.models.wallet import Wallet
-
-        sender_wallet_result = await db.execute(
-            select(Wallet).where(Wallet.user_id == auth_user.id)
-        )
-        sender_wallet = sender_wallet_result.scalars().first()
+        sender_wallet = auth_user.wallet
 
         if not sender_wallet:
             raise HTTPException(
@@ -410,14 +198,11 @@ async def transfer_funds(
             db=db
         )
 
-        logger.info(f"Transfer completed: {auth_user.id} transferred ₦{transfer_data.amount}")
+        logger.info("Transfer completed: %s transferred ₦%s", user_id, transfer_data.amount)
         return transfer_response
 
-    except HTTPException:
-        raise
-    except Exception as e:
-        user_id = getattr(auth_user, "id", "unknown")
-        logger.error(f"Transfer failed for user {user_id}: {e}")
+    except ValueError as e:
+        logger.error("Transfer failed for user %s: %s", user_id, e)
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=f"Transfer failed: {str(e)}"
@@ -426,9 +211,9 @@ async def transfer_funds(
 
 @wallet_router.get("/transactions", response_model=TransactionHistoryResponse)
 async def get_transaction_history(
-    request: Request,
     skip: int = 0,
     limit: int = 50,
+    auth_user: User = Depends(get_auth_user),
     db: AsyncSession = Depends(get_db)
 ):
     """
@@ -438,56 +223,17 @@ async def get_transaction_history(
     Includes pagination for large transaction lists.
 
     Args:
-        request: HTTP request for auth detection.
         skip: Number of transactions to skip (pagination).
         limit: Maximum transactions to return.
+        auth_user: Authenticated user.
         db: Database session.
 
     Returns:
         TransactionHistoryResponse: Paginated transaction history.
 
     Raises:
-        HTTPException: If authentication fails.
+        HTTPException: If transactions cannot be retrieved.
     """
-    # Get authenticated user
-    auth_user = None
-
-    if request.headers.get("x-api-key"):
-        api_key_obj, api_key_user = await APIKeyService.validate_api_key(request.headers.get("x-api-key"), db)
-        if not api_key_user or not api_key_obj:
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid API key"
-            )
-        auth_user = api_key_user
-    else:
-        auth_header = request.headers.get("authorization")
-        if not auth_header or not auth_header.startswith("Bearer "):
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED, detail="Authentication required"
-            )
-
-        token = auth_header[7:]
-        from app.core.security import verify_token
-        token_data = verify_token(token)
-        user_sub = token_data.get("sub")
-
-        if not user_sub:
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token"
-            )
-
-        from sqlalchemy.future import select
-        from app.models.user import User
-        result = await db.execute(
-            select(User).where(User.google_sub == user_sub)
-        )
-        auth_user = result.scalars().first()
-
-        if not auth_user:
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED, detail="User not found"
-            )
-
     try:
         # Get transaction history
         total, transactions = await TransferService.get_user_transactions(
@@ -497,79 +243,86 @@ async def get_transaction_history(
             limit=limit
         )
 
-        # Convert to response model
-        transaction_responses = []
-        for transaction in transactions:
-            transaction_responses.append(
-                TransactionResponse(
-                    id=str(transaction.id),
-                    user_id=str(transaction.user_id),
-                    transaction_type=transaction.transaction_type.value if hasattr(transaction.transaction_type, 'value') else str(transaction.transaction_type),
-                    amount=str(transaction.amount),
-                    description=transaction.description,
-                    status=transaction.status.value if hasattr(transaction.status, 'value') else str(transaction.status),
-                    reference=transaction.reference,
-                    created_at=transaction.created_at
-                )
-            )
+        # Convert to response models
+        transaction_responses = _transaction_list_adapter.validate_python(
+            transactions, from_attributes=True
+        )
 
-        logger.info(f"Retrieved {len(transaction_responses)} transactions for user {auth_user.id}")
+        logger.info(
+            "Retrieved %s transactions for user %s",
+            len(transaction_responses), auth_user.id,
+        )
         return TransactionHistoryResponse(
             total=total,
             transactions=transaction_responses
         )
 
-    except Exception as e:
-        user_id = getattr(auth_user, "id", "unknown")
-        logger.error(f"Failed to get transactions for user {user_id}: {e}")
+    except SQLAlchemyError as e:
+        logger.error("Failed to get transactions for user %s: %s", auth_user.id, e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Unable to retrieve transaction history",
         )
 
 
+async def _process_webhook_in_background(webhook_data: Dict[str, Any]) -> None:
+    """
+    Process a verified Paystack webhook after the response has been sent.
+
+    Runs with its own database session because the request-scoped one is
+    closed once the response is returned.
+
+    Args:
+        webhook_data: Verified webhook payload.
+    """
+    try:
+        async with AsyncSessionLocal() as db:
+            success = await PaystackService.process_deposit_webhook(webhook_data, db)
+        if not success:
+            logger.error("Webhook processing failed")
+    except Exception:
+        # Paystack won't retry after the early 200, so keep the traceback
+        logger.exception("Webhook processing error")
+
+
 @wallet_router.post("/paystack/webhook")
-async def paystack_webhook(request: Request, db: AsyncSession = Depends(get_db)):
+async def paystack_webhook(request: Request, background_tasks: BackgroundTasks):
     """
     Handle Paystack webhook for payment completion.
 
-    Processes charge.success events and credits wallet balances atomically.
-    Implements signature verification and idempotency.
+    Verifies the signature and acknowledges immediately; charge.success
+    events are processed in the background, where the wallet is credited
+    atomically and duplicate deliveries are ignored.
 
     Args:
         request: Raw HTTP request with webhook data.
-        db: Database session.
+        background_tasks: Tasks run after the response is sent.
 
     Returns:
         dict: Webhook response.
     """
-    try:
-        # Get raw request body for signature verification
-        body = await request.body()
-        webhook_data = await request.json()
+    # Reject unsigned requests before reading the body
+    signature_header = request.headers.get("x-paystack-signature")
+    if not signature_header:
+        logger.error("Missing Paystack webhook signature")
+        return ORJSONResponse({"status": "error"}, status_code=status.HTTP_400_BAD_REQUEST)
 
-        # Extract and verify signature
-        signature_header = request.headers.get("x-paystack-signature")
-        if not signature_header:
-            logger.error("Missing Paystack webhook signature")
-            return {"status": "error"}, 400
+    # Get raw request body for signature verification
+    body = await request.body()
 
-        if not verify_paystack_webhook_signature(body, signature_header):
-            logger.error("Invalid Paystack webhook signature")
-            logger.error(f"Expected signature for body: {body[:100]}...")
-            return {"status": "error"}, 400
+    if not await verify_paystack_webhook_signature(body, signature_header):
+        logger.error("Invalid Paystack webhook signature")
+        return ORJSONResponse({"status": "error"}, status_code=status.HTTP_400_BAD_REQUEST)
 
-        logger.info(f"Received verified Paystack webhook: {webhook_data.get('event')}")
-
-        # Process the webhook
-        success = await PaystackService.process_deposit_webhook(webhook_data, db)
+    try:
+        # Parse the already-read body only once it is known to be genuine
+        webhook_data = orjson.loads(body)
+    except orjson.JSONDecodeError:
+        logger.error("Malformed Paystack webhook payload")
+        return ORJSONResponse({"status": "error"}, status_code=status.HTTP_400_BAD_REQUEST)
 
-        if success:
-            return {"status": "success"}
-        else:
-            logger.error("Webhook processing failed")
-            return {"status": "error"}, 500
+    logger.info("Received verified Paystack webhook: %s", webhook_data.get('event'))
 
-    except Exception as e:
-        logger.error(f"Webhook processing error: {e}")
-        return {"status": "error"}, 500
+    # Acknowledge now; crediting the wallet happens after the response
+    background_tasks.add_task(_process_webhook_in_background, webhook_data)
+    return {"status": "success"}
@@ -1,7 +1,9 @@
 
 
 import os
-from typing import Optional
+from datetime import date
+from functools import lru_cache
+from typing import List, Optional
 
 from pydantic_settings import BaseSettings
 
@@ -14,8 +16,17 @@ class Settings(BaseSettings):
     with fallback defaults for development.
     """
 
+    # Deployment environment: development, test or production
+    environment: str = os.getenv("ENVIRONMENT", "development")
+
     # Database
     database_url: str = os.getenv("DATABASE_URL", "YOUR_DEFAULT_DATABASE_URL")
+    db_pool_size: int = int(os.getenv("DB_POOL_SIZE", "10"))
+    db_max_overflow: int = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+    db_pool_timeout: int = int(os.getenv("DB_POOL_TIMEOUT", "10"))
+    db_pool_recycle: int = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+    # Disable app-side pooling when an external pooler (PgBouncer) is used
+    db_use_null_pool: bool = os.getenv("DB_USE_NULL_POOL", "false").lower() == "true"
 
     # JWT settings
     secret_key: str = os.getenv("SECRET_KEY", "your-super-secret-key-change-in-production")
@@ -24,6 +35,10 @@ class Settings(BaseSettings):
 
     # API Key settings
     api_key_salt: str = os.getenv("API_KEY_SALT", "your-api-key-salt-change-in-production")
+    # Argon2 fallback for keys created before key_lookup existed: switched off
+    # from this date (YYYY-MM-DD), and at most scan_limit hashes per request
+    legacy_api_key_fallback_until: Optional[date] = os.getenv("LEGACY_API_KEY_FALLBACK_UNTIL") or None
+    legacy_api_key_scan_limit: int = int(os.getenv("LEGACY_API_KEY_SCAN_LIMIT", "20"))
 
     # Google OAuth settings
     google_client_id: Optional[str] = os.getenv("GOOGLE_CLIENT_ID")
@@ -35,11 +50,43 @@ class Settings(BaseSettings):
     paystack_public_key: str = os.getenv("PAYSTACK_PUBLIC_KEY", "pk_test_your-public-key")
     paystack_base_url: str = os.getenv("PAYSTACK_BASE_URL", "your-paystack-base-url")
 
+    # CORS settings (comma-separated origins)
+    cors_allowed_origins: str = os.getenv("CORS_ALLOWED_ORIGINS", "*")
+
+    @property
+    def cors_origins(self) -> List[str]:
+        """Allowed CORS origins as a list."""
+        return [o.strip() for o in self.cors_allowed_origins.split(",") if o.strip()]
+
+    def legacy_api_key_fallback_enabled(self, today: date) -> bool:
+        """Whether API keys without a key_lookup digest may still be verified."""
+        cutoff = self.legacy_api_key_fallback_until
+        return cutoff is None or today < cutoff
+
+    @property
+    def create_tables_on_startup(self) -> bool:
+        """Whether init_db() should run at startup instead of Alembic."""
+        return self.environment.lower() in ("development", "test")
+
     class Config:
         env_file = ".env"
         case_sensitive = False
         extra = "ignore"
 
 
+@lru_cache(maxsize=1)
+def get_settings() -> Settings:
+    """
+    Get the application settings.
+
+    Parsed once and cached, so it can be used as a FastAPI dependency
+    without re-reading the environment and .env file.
+
+    Returns:
+        Settings: Cached settings instance.
+    """
+    return Settings()
+
+
 # Global settings instance
-settings = Settings()
+settings = get_settings()
@@ -0,0 +1,104 @@
+
+import asyncio
+import base64
+import hashlib
+import hmac
+import re
+import time
+from typing import Any, Dict, Optional
+
+import jwt
+
+from app.core.config import settings
+from app.core.http_client import get_http_client
+
+
+GOOGLE_CERTS_URL = "https://www.googleapis.com/oauth2/v3/certs"
+GOOGLE_ISSUERS = ("accounts.google.com", "https://accounts.google.com")
+
+# Used when Google's response has no usable Cache-Control max-age
+DEFAULT_JWKS_MAX_AGE = 3600
+ID_TOKEN_LEEWAY_SECONDS = 10
+
+_MAX_AGE_RE = re.compile(r"max-age=(\d+)")
+
+# Google signing keys by kid, refreshed lazily once max-age has elapsed
+_jwks: Dict[str, Dict[str, Any]] = {}
+_jwks_expires_at = 0.0
+_jwks_lock = asyncio.Lock()
+
+
+async def _refresh_jwks() -> None:
+    """Fetch Google's JWK set and cache it for the advertised max-age."""
+    global _jwks, _jwks_expires_at
+
+    response = await get_http_client().get(GOOGLE_CERTS_URL)
+    response.raise_for_status()
+
+    match = _MAX_AGE_RE.search(response.headers.get("cache-control", ""))
+    max_age = int(match.group(1)) if match else DEFAULT_JWKS_MAX_AGE
+
+    _jwks = {key["kid"]: key for key in response.json().get("keys", [])}
+    _jwks_expires_at = time.monotonic() + max_age
+
+
+async def get_google_signing_key(kid: Optional[str]) -> Optional[Dict[str, Any]]:
+    """
+    Get a Google signing key from the cached JWK set.
+
+    The set is refetched when it has expired or when the requested kid is
+    unknown (Google has rotated its keys).
+
+    Args:
+        kid: Key ID from the ID token header.
+
+    Returns:
+        Optional[Dict[str, Any]]: JWK if found, None otherwise.
+    """
+    if time.monotonic() >= _jwks_expires_at or kid not in _jwks:
+        async with _jwks_lock:
+            # Another request may have refreshed while we waited
+            if time.monotonic() >= _jwks_expires_at or kid not in _jwks:
+                await _refresh_jwks()
+    return _jwks.get(kid)
+
+
+async def verify_google_id_token(
+    token: str, access_token: Optional[str] = None
+) -> Dict[str, Any]:
+    """
+    Verify a Google ID token locally against the cached JWK set.
+
+    Args:
+        token: ID token returned by Google's token endpoint.
+        access_token: Access token issued alongside it, checked against at_hash.
+
+    Returns:
+        Dict[str, Any]: Verified token claims.
+
+    Raises:
+        jwt.PyJWTError: If the token is malformed, signed by an unknown key,
+            or fails signature, audience, issuer, expiry or at_hash checks.
+    """
+    header = jwt.get_unverified_header(token)
+    key = await get_google_signing_key(header.get("kid"))
+    if key is None:
+        raise jwt.InvalidTokenError("Unknown Google signing key")
+
+    claims = jwt.decode(
+        token,
+        jwt.PyJWK(key, algorithm="RS256"),
+        algorithms=["RS256"],
+        audience=settings.google_client_id,
+        issuer=GOOGLE_ISSUERS,
+        leeway=ID_TOKEN_LEEWAY_SECONDS,
+    )
+
+    # PyJWT doesn't check OIDC at_hash; do it when both sides are present
+    if access_token and "at_hash" in claims:
+        digest = hashlib.sha256(access_token.encode("ascii")).digest()
+        expected = base64.urlsafe_b64encode(digest[:16]).rstrip(b"=").decode("ascii")
+        if not hmac.compare_digest(expected, claims["at_hash"]):
+            raise jwt.InvalidTokenError("Invalid at_hash")
+
+    return claims
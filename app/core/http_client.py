@@ -0,0 +1,34 @@
+
+from typing import Optional
+
+import httpx
+
+
+# Shared client for outbound HTTPS calls (Google OAuth, etc.)
+_http_client: Optional[httpx.AsyncClient] = None
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """
+    Get the shared async HTTP client.
+
+    Reuses pooled keep-alive connections so repeated calls to the same
+    host skip the TCP + TLS handshake.
+
+    Returns:
+        httpx.AsyncClient: Shared HTTP client.
+    """
+    global _http_client
+    if _http_client is None:
+        _http_client = httpx.AsyncClient(
+            limits=httpx.Limits(max_keepalive_connections=20, max_connections=100),
+        )
+    return _http_client
+
+
+async def close_http_client() -> None:
+    """Close the shared HTTP client if it has been created."""
+    global _http_client
+    if _http_client is not None:
+        await _http_client.aclose()
+        _http_client = None
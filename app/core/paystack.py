@@ -1,8 +1,10 @@
 
 import logging
+from functools import lru_cache
 from typing import Any, Dict, Optional
 
 import httpx
+import orjson
 
 from app.core.config import settings
 
@@ -10,6 +12,10 @@ from app.core.config import settings
 logger = logging.getLogger(__name__)
 
 
+class PaystackError(Exception):
+    """Raised when a Paystack API call fails or returns an error."""
+
+
 class PaystackClient:
     """
     HTTP client wrapper for Paystack API integration.
@@ -23,15 +29,22 @@ class PaystackClient:
         self.secret_key = settings.paystack_secret_key
         self.public_key = settings.paystack_public_key
 
-        # HTTP client configuration
+        # HTTP client configuration; HTTP/2 multiplexes concurrent calls
+        # over the pooled connections
         self.client = httpx.AsyncClient(
             base_url=self.base_url,
+            http2=True,
             headers={
                 "Authorization": f"Bearer {self.secret_key}",
                 "Content-Type": "application/json",
                 "Accept": "application/json",
             },
-            timeout=30.0, 
+            timeout=30.0,
+            limits=httpx.Limits(
+                max_connections=100,
+                max_keepalive_connections=20,
+                keepalive_expiry=30.0,
+            ),
         )
 
     async def close(self):
@@ -49,23 +62,24 @@ class PaystackClient:
             Dict containing response data.
 
         Raises:
-            Exception: If API returned error status.
+            PaystackError: If API returned error status.
         """
         try:
-            data = response.json()
-        except Exception:
-            logger.error(f"Invalid JSON response from Paystack: {response.text}")
-            raise Exception("Invalid response from Paystack API")
+            data = orjson.loads(response.content)
+        except orjson.JSONDecodeError:
+            # Logging formats the %r lazily; only a bounded prefix is kept
+            logger.error("Invalid JSON response from Paystack: %r", response.content[:512])
+            raise PaystackError("Invalid response from Paystack API")
 
         if not response.is_success:
             error_msg = data.get("message", "Unknown Paystack error")
-            logger.error(f"Paystack API error ({response.status_code}): {error_msg}")
-            raise Exception(f"Paystack API error: {error_msg}")
+            logger.error("Paystack API error (%s): %s", response.status_code, error_msg)
+            raise PaystackError(f"Paystack API error: {error_msg}")
 
         if not data.get("status", False):
             error_msg = data.get("message", "Paystack request failed")
-            logger.error(f"Paystack request failed: {error_msg}")
-            raise Exception(f"Paystack request failed: {error_msg}")
+            logger.error("Paystack request failed: %s", error_msg)
+            raise PaystackError(f"Paystack request failed: {error_msg}")
 
         return data
 
@@ -81,20 +95,18 @@ class PaystackClient:
             Dict: Response data from Paystack.
         """
         url = endpoint.lstrip('/')  
-        logger.info(f"Making POST request to Paystack: {url}")
+        logger.info("Making POST request to Paystack: %s", url)
 
         try:
-            response = await self.client.post(url, json=data or {})
+            content = orjson.dumps(data) if data is not None else None
+            response = await self.client.post(url, content=content)
             return self._handle_response(response)
         except httpx.TimeoutException:
-            logger.error(f"Timeout making POST request to {url}")
-            raise Exception("Paystack API request timed out")
-        except httpx.HTTPStatusError as e:
-            logger.error(f"HTTP error making POST request to {url}: {e}")
-            raise Exception(f"Paystack HTTP error: {e.response.status_code}")
-        except Exception as e:
-            logger.error(f"Unexpected error making POST request to {url}: {e}")
-            raise
+            logger.error("Timeout making POST request to %s", url)
+            raise PaystackError("Paystack API request timed out")
+        except httpx.HTTPError as e:
+            logger.error("HTTP error making POST request to %s: %s", url, e)
+            raise PaystackError(f"Paystack HTTP error: {e}")
 
     async def get(self, endpoint: str, params: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
         """
@@ -108,20 +120,17 @@ class PaystackClient:
             Dict: Response data from Paystack.
         """
         url = endpoint.lstrip('/')
-        logger.info(f"Making GET request to Paystack: {url}")
+        logger.info("Making GET request to Paystack: %s", url)
 
         try:
-            response = await self.client.get(url, params=params or {})
+            response = await self.client.get(url, params=params)
             return self._handle_response(response)
         except httpx.TimeoutException:
-            logger.error(f"Timeout making GET request to {url}")
-            raise Exception("Paystack API request timed out")
-        except httpx.HTTPStatusError as e:
-            logger.error(f"HTTP error making GET request to {url}: {e}")
-            raise Exception(f"Paystack HTTP error: {e.response.status_code}")
-        except Exception as e:
-            logger.error(f"Unexpected error making GET request to {url}: {e}")
-            raise
+            logger.error("Timeout making GET request to %s", url)
+            raise PaystackError("Paystack API request timed out")
+        except httpx.HTTPError as e:
+            logger.error("HTTP error making GET request to %s: %s", url, e)
+            raise PaystackError(f"Paystack HTTP error: {e}")
 
     async def initialize_transaction(
         self,
@@ -220,17 +229,22 @@ class PaystackClient:
         return self.secret_key.startswith("sk_live_")
 
 
-# Singleton instance for application-wide use
-_paystack_client = None
-
+@lru_cache(maxsize=1)
 def get_paystack_client() -> PaystackClient:
     """
     Get singleton Paystack client instance.
 
+    Built once (eagerly in the app lifespan) and cached; later calls
+    return the cached client without any global lookup.
+
     Returns:
         PaystackClient: Configured Paystack client.
     """
-    global _paystack_client
-    if _paystack_client is None:
-        _paystack_client = PaystackClient()
-    return _paystack_client
+    return PaystackClient()
+
+
+async def close_paystack_client() -> None:
+    """Close the singleton Paystack client if it has been created."""
+    if get_paystack_client.cache_info().currsize:
+        await get_paystack_client().close()
+        get_paystack_client.cache_clear()
@@ -1,18 +1,20 @@
 
 
 import hashlib
+import hmac
 import logging
 import secrets
-from datetime import datetime, timedelta
+import time
+from datetime import timedelta
 from typing import Optional
 
 import argon2
-from jose import JWTError, jwt
+import jwt
 
 from app.core.config import settings
 
 
-# Set up argon2 hasher
+# Argon2 hasher, kept only to verify API keys hashed before the HMAC scheme
 ph = argon2.PasswordHasher(
     time_cost=3,
     memory_cost=65536,
@@ -23,6 +25,17 @@ ph = argon2.PasswordHasher(
 
 logger = logging.getLogger(__name__)
 
+# JWT signing key encoded once rather than on every encode/decode
+_JWT_SECRET_KEY = settings.secret_key.encode("utf-8")
+_ACCESS_TOKEN_EXPIRE_SECONDS = settings.access_token_expire_minutes * 60
+
+# Server-side pepper for API key hashes
+_API_KEY_PEPPER = settings.api_key_salt.encode("utf-8")
+
+# Generated keys are the prefix plus token_urlsafe(32), always 43 characters
+API_KEY_PREFIX = "sk_live_"
+API_KEY_LENGTH = len(API_KEY_PREFIX) + 43
+
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     """
@@ -36,12 +49,13 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
         str: Encoded JWT token.
     """
     to_encode = data.copy()
+    # Integer epoch seconds: no datetime construction or timegm conversion
     if expires_delta:
-        expire = datetime.utcnow() + expires_delta
+        expire = int(time.time() + expires_delta.total_seconds())
     else:
-        expire = datetime.utcnow() + timedelta(minutes=settings.access_token_expire_minutes)
+        expire = int(time.time()) + _ACCESS_TOKEN_EXPIRE_SECONDS
     to_encode.update({"exp": expire})
-    encoded_jwt = jwt.encode(to_encode, settings.secret_key, algorithm=settings.algorithm)
+    encoded_jwt = jwt.encode(to_encode, _JWT_SECRET_KEY, algorithm=settings.algorithm)
     return encoded_jwt
 
 
@@ -56,9 +70,9 @@ def verify_token(token: str) -> Optional[dict]:
         Optional[dict]: Decoded token payload or None if invalid.
     """
     try:
-        payload = jwt.decode(token, settings.secret_key, algorithms=[settings.algorithm])
+        payload = jwt.decode(token, _JWT_SECRET_KEY, algorithms=[settings.algorithm])
         return payload
-    except JWTError:
+    except jwt.PyJWTError:
         return None
 
 
@@ -75,27 +89,52 @@ def generate_api_key() -> str:
     secret_part = secrets.token_urlsafe(32)
 
     # For now, generate live keys (can be made configurable)
-    prefix = "sk_live_"
+    prefix = API_KEY_PREFIX
 
     return f"{prefix}{secret_part}"
 
 
+def compute_key_lookup(api_key: str) -> str:
+    """
+    Compute the deterministic lookup digest for an API key.
+
+    Argon2 hashes are salted, so they can't be searched; this SHA-256
+    digest is stored alongside them to find the candidate row directly.
+
+    Args:
+        api_key: The raw API key.
+
+    Returns:
+        str: Hex-encoded SHA-256 digest of the key.
+    """
+    return hashlib.sha256(api_key.encode("utf-8")).hexdigest()
+
+
 def hash_api_key(api_key: str) -> str:
     """
-    Hash an API key using bcrypt (via argon2).
+    Hash an API key using HMAC-SHA256 keyed with the server-side pepper.
+
+    API keys carry ~256 bits of randomness, so a slow password KDF adds
+    cost without adding security; the pepper keeps a leaked table useless
+    without the app secret.
 
     Args:
         api_key: The raw API key to hash.
 
     Returns:
-        str: Bcrypt hash of the API key.
+        str: Hex-encoded HMAC of the API key.
     """
-    try:
-        hashed = ph.hash(api_key)
-        return hashed
-    except Exception as e:
-        logger.error(f"Failed to hash API key: {e}")
-        raise
+    return hmac.new(_API_KEY_PEPPER, api_key.encode("utf-8"), hashlib.sha256).hexdigest()
+
+
+def is_well_formed_api_key(api_key: str) -> bool:
+    """Check that a key has the shape generate_api_key() produces."""
+    return len(api_key) == API_KEY_LENGTH and api_key.startswith(API_KEY_PREFIX)
+
+
+def is_legacy_api_key_hash(hashed_key: str) -> bool:
+    """Check if a stored hash was produced by the old Argon2 scheme."""
+    return hashed_key.startswith("$argon2")
 
 
 def verify_api_key(plain_key: str, hashed_key: str) -> bool:
@@ -104,16 +143,19 @@ def verify_api_key(plain_key: str, hashed_key: str) -> bool:
 
     Args:
         plain_key: The plain API key.
-        hashed_key: The stored hash.
+        hashed_key: The stored hash (HMAC-SHA256, or Argon2 for older keys).
 
     Returns:
         bool: True if the key matches the hash.
     """
+    if not is_legacy_api_key_hash(hashed_key):
+        return hmac.compare_digest(hash_api_key(plain_key), hashed_key)
+
     try:
         ph.verify(hashed_key, plain_key)
         return True
     except argon2.exceptions.VerifyMismatchError:
         return False
     except Exception as e:
-        logger.error(f"Failed to verify API key: {e}")
+        logger.error("Failed to verify API key: %s", e)
         return False
@@ -3,13 +3,25 @@
 from typing import AsyncGenerator
 
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine, async_sessionmaker
+from sqlalchemy.pool import NullPool
 
 from app.core.config import settings
 from app.db.base import Base
 
 
 # Async database engine
-engine = create_async_engine(settings.database_url, echo=False)
+if settings.db_use_null_pool:
+    engine = create_async_engine(settings.database_url, echo=False, poolclass=NullPool)
+else:
+    engine = create_async_engine(
+        settings.database_url,
+        echo=False,
+        pool_size=settings.db_pool_size,
+        max_overflow=settings.db_max_overflow,
+        pool_timeout=settings.db_pool_timeout,
+        pool_recycle=settings.db_pool_recycle,
+        pool_pre_ping=True,
+    )
 
 # Async session factory
 AsyncSessionLocal = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
@@ -35,8 +47,9 @@ async def init_db():
     """
     Initialize database and create all tables.
 
-    Creates all tables defined in the models if they don't exist.
-    Should be called during application startup.
+    Creates all tables defined in the models if they don't exist. Only
+    meant for local development and tests; deployed databases are managed
+    with Alembic (``alembic upgrade head``).
     """
     async with engine.begin() as conn:
         await conn.run_sync(Base.metadata.create_all)
@@ -1,19 +1,78 @@
 
 
-from fastapi import Depends, HTTPException, status
+from typing import Any, Dict, Optional
+from uuid import UUID
+
+from fastapi import Depends, HTTPException, Request, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
+from sqlalchemy.orm import joinedload
 
 from app.core.security import verify_token
 from app.db.session import get_db
 from app.models.user import User
+from app.services.api_key_service import APIKeyService
 
 
 # JWT Bearer token dependency
 bearer_scheme = HTTPBearer(auto_error=False)
 
 
+async def _get_user_by_sub(
+    db: AsyncSession,
+    google_sub: str,
+    with_wallet: bool = False
+) -> Optional[User]:
+    """
+    Load a user by Google sub, for tokens issued before the 'uid' claim.
+
+    Args:
+        db: Database session.
+        google_sub: Google subject identifier from the JWT.
+        with_wallet: Whether to load the user's wallet in the same query.
+
+    Returns:
+        Optional[User]: User if found, None otherwise.
+    """
+    options = [joinedload(User.wallet)] if with_wallet else []
+    return await db.scalar(
+        select(User).options(*options).where(User.google_sub == google_sub)
+    )
+
+
+async def _get_user_from_claims(
+    db: AsyncSession,
+    token_data: Dict[str, Any],
+    with_wallet: bool = False
+) -> Optional[User]:
+    """
+    Load the user identified by verified JWT claims.
+
+    Tokens carry the user's primary key in 'uid'; tokens issued before
+    that claim existed fall back to the Google sub lookup.
+
+    Args:
+        db: Database session.
+        token_data: Decoded JWT payload.
+        with_wallet: Whether to load the user's wallet in the same query.
+
+    Returns:
+        Optional[User]: User if found, None otherwise.
+    """
+    uid = token_data.get("uid")
+    if uid is None:
+        return await _get_user_by_sub(db, token_data["sub"], with_wallet)
+
+    try:
+        user_id = UUID(uid)
+    except ValueError:
+        return None
+
+    options = [joinedload(User.wallet)] if with_wallet else []
+    return await db.get(User, user_id, options=options)
+
+
 async def get_current_user(
     credentials: HTTPAuthorizationCredentials = Depends(bearer_scheme),
     db: AsyncSession = Depends(get_db)
@@ -47,12 +106,8 @@ async def get_current_user(
             headers={"WWW-Authenticate": "Bearer"},
         )
 
-    # Find user by Google sub (stored in JWT as 'sub')
-    google_sub = token_data["sub"]
-    result = await db.execute(
-        select(User).where(User.google_sub == google_sub)
-    )
-    user = result.scalars().first()
+    # Find user by id (or Google sub for older tokens)
+    user = await _get_user_from_claims(db, token_data)
 
     if not user:
         raise HTTPException(
@@ -61,3 +116,106 @@ async def get_current_user(
         )
 
     return user
+
+
+async def _authenticate_request(
+    request: Request,
+    db: AsyncSession,
+    required_permission: Optional[str] = None
+) -> User:
+    """
+    Authenticate a request via x-api-key header or JWT bearer token.
+
+    API key authentication takes precedence when the header is present.
+    The user's wallet is loaded alongside the user.
+
+    Args:
+        request: FastAPI request object.
+        db: Database session.
+        required_permission: Permission the API key must hold, if any.
+
+    Returns:
+        User: Authenticated user with wallet loaded.
+
+    Raises:
+        HTTPException: If credentials are missing, invalid, or lack permission.
+    """
+    api_key = request.headers.get("x-api-key")
+    if api_key:
+        api_key_obj, user = await APIKeyService.validate_api_key(api_key, db)
+        if not api_key_obj or not user:
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Invalid API key"
+            )
+
+        if required_permission and not api_key_obj.has_permission(required_permission):
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail=f"API key does not have {required_permission} permission"
+            )
+
+        return user
+
+    auth_header = request.headers.get("authorization")
+    if not auth_header or not auth_header.startswith("Bearer "):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Authentication required",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+
+    token_data = verify_token(auth_header[7:])
+    if not token_data or "sub" not in token_data:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid authentication token",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+
+    # Load user and wallet in a single query
+    user = await _get_user_from_claims(db, token_data, with_wallet=True)
+
+    if not user:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="User not found",
+        )
+
+    return user
+
+
+async def get_auth_user(
+    request: Request,
+    db: AsyncSession = Depends(get_db)
+) -> User:
+    """
+    Dependency to authenticate via API key or JWT token.
+
+    Args:
+        request: FastAPI request object.
+        db: Database session.
+
+    Returns:
+        User: Authenticated user with wallet loaded.
+    """
+    return await _authenticate_request(request, db)
+
+
+async def get_wallet_write_user(
+    request: Request,
+    db: AsyncSession = Depends(get_db)
+) -> User:
+    """
+    Dependency to authenticate a request that modifies the wallet.
+
+    Same as get_auth_user, but API keys must hold the wallet:write permission.
+
+    Args:
+        request: FastAPI request object.
+        db: Database session.
+
+    Returns:
+        User: Authenticated user with wallet loaded.
+    """
+    return await _authenticate_request(request, db, required_permission="wallet:write")
@@ -1,13 +1,22 @@
+import asyncio
+import logging
 from contextlib import asynccontextmanager
 
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
 
 from app.api.v1.auth_route import auth_router
 from app.api.v1.key_route import keys_router
 from app.api.v1.wallet import wallet_router
 from app.core.config import settings
+from app.core.http_client import close_http_client, get_http_client
+from app.core.paystack import close_paystack_client, get_paystack_client
 from app.db.session import init_db
+from app.services.api_key_service import flush_last_used, run_last_used_flusher
+
+
+logger = logging.getLogger(__name__)
 
 
 @asynccontextmanager
@@ -15,12 +24,32 @@ async def lifespan(app: FastAPI):
     """
     Application lifespan context manager.
 
-    Handles startup and shutdown events. Currently initializes database
-    tables on startup.
+    Handles startup and shutdown events. Creates database tables in
+    development and test (deployed schemas are migrated with Alembic),
+    warms the outbound HTTP clients (shared and Paystack) and starts the
+    API key last_used_at flusher on startup, and stops them on shutdown.
     """
-    # Startup: create tables
-    await init_db()
+    # Startup: create tables outside production and warm the HTTP clients
+    if settings.create_tables_on_startup:
+        await init_db()
+    get_http_client()
+    get_paystack_client()
+    last_used_flusher = asyncio.create_task(run_last_used_flusher())
     yield
+    # Shutdown: write pending last_used_at values and release pooled connections
+    last_used_flusher.cancel()
+    try:
+        await last_used_flusher
+    except asyncio.CancelledError:
+        pass
+    except Exception:
+        # A crashed flusher must not stop the rest of the teardown
+        logger.exception("API key last_used_at flusher stopped unexpectedly")
+    try:
+        await flush_last_used()
+    finally:
+        await close_paystack_client()
+        await close_http_client()
 
 
 def create_app() -> FastAPI:
@@ -37,16 +66,18 @@ def create_app() -> FastAPI:
         title="Bashwallet API",
         description="Secure wallet service with Paystack integration",
         version="1.0.0",
+        default_response_class=ORJSONResponse,
         lifespan=lifespan
     )
 
-    # CORS middleware
+    # CORS middleware. Auth is header-based (Bearer / x-api-key), so no
+    # credentials are needed; explicit lists keep preflights static
     app.add_middleware(
         CORSMiddleware,
-        allow_origins=["*"],  
-        allow_credentials=True,
-        allow_methods=["*"],
-        allow_headers=["*"],
+        allow_origins=settings.cors_origins,
+        allow_credentials=False,
+        allow_methods=["GET", "POST"],
+        allow_headers=["authorization", "content-type", "x-api-key"],
     )
 
     # Include routers
@@ -1,9 +1,11 @@
 
 
 import uuid
-from datetime import datetime
-from sqlalchemy import Column, DateTime, ForeignKey, String, Boolean, JSON, Index
+from datetime import datetime, timezone
+from functools import cached_property
+from sqlalchemy import Column, DateTime, ForeignKey, String, Boolean, JSON, Index, event, text
 from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.orm import relationship, validates
 from sqlalchemy.sql import func
 
 from app.db.base import Base
@@ -23,6 +25,8 @@ class APIKey(Base):
     user_id = Column(UUID(as_uuid=True), ForeignKey("users.id"), nullable=False, index=True)
     name = Column(String, nullable=False)
     hashed_key = Column(String, unique=True, nullable=False, index=True)
+    # SHA-256 of the plain key for direct lookup; NULL on keys created before it existed
+    key_lookup = Column(String(64), unique=True, nullable=True, index=True)
     permissions = Column(JSON, default=list, nullable=False) 
     expires_at = Column(DateTime(timezone=True), nullable=False)
     revoked = Column(Boolean, default=False, nullable=False)
@@ -30,15 +34,25 @@ class APIKey(Base):
     last_used_at = Column(DateTime(timezone=True), nullable=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
 
+    # Owning user; must be eager-loaded, lazy loads fail under asyncio anyway
+    user = relationship("User", back_populates="api_keys", lazy="raise")
+
     # Composite index for efficient key lookups
     __table_args__ = (
-        Index('ix_api_keys_user_not_revoked', 'user_id', 'revoked'),
+        # Covers the per-user active key count without touching the table
+        Index('ix_api_keys_user_active', 'user_id', 'revoked', 'expires_at'),
         Index('ix_api_keys_expires_at', 'expires_at'),
+        # Validation only ever looks up non-revoked keys; expiry is time-varying
+        # so it stays out of the predicate and is checked per row
+        Index(
+            'ix_api_keys_active_lookup',
+            'key_lookup',
+            postgresql_where=text('revoked = false'),
+        ),
     )
 
     def is_expired(self) -> bool:
         """Check if the API key has expired."""
-        from datetime import timezone
         # expires_at is timezone-aware, so compare with UTC now
         utc_now = datetime.now(timezone.utc)
         return utc_now >= self.expires_at
@@ -47,12 +61,28 @@ class APIKey(Base):
         """Check if the API key is active (not revoked and not expired)."""
         return not self.revoked and not self.is_expired()
 
+    @cached_property
+    def permission_set(self) -> frozenset:
+        """Permissions as a frozenset, built once per loaded instance."""
+        return frozenset(self.permissions or ())
+
+    @validates("permissions")
+    def _reset_permission_set(self, key: str, permissions: list) -> list:
+        """Drop the cached permission set when permissions are reassigned."""
+        self.__dict__.pop("permission_set", None)
+        return permissions
+
     def has_permission(self, permission: str) -> bool:
         """Check if the API key has a specific permission."""
-        return permission in self.permissions
+        return permission in self.permission_set
 
     def revoke(self) -> None:
         """Revoke the API key."""
-        from datetime import timezone
         self.revoked = True
         self.revoked_at = datetime.now(timezone.utc)
+
+
+@event.listens_for(APIKey, "refresh")
+def _reset_permission_set_on_refresh(target: APIKey, context, attrs) -> None:
+    """Drop the cached permission set when the row is reloaded."""
+    target.__dict__.pop("permission_set", None)
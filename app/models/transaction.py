@@ -1,11 +1,11 @@
 
 
 from decimal import Decimal
-from datetime import datetime
+from datetime import datetime, timezone
 import enum
 import uuid
 
-from sqlalchemy import Column, Enum, String, Numeric, ForeignKey, DateTime, Text, JSON
+from sqlalchemy import Column, Enum, String, Numeric, ForeignKey, DateTime, Text, JSON, Index, text
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
@@ -52,7 +52,7 @@ class Transaction(Base):
     status = Column(Enum(TransactionStatus), default=TransactionStatus.PENDING, nullable=False, index=True)
 
     # Reference fields for external tracking
-    reference = Column(String(100), nullable=True, index=True)  
+    reference = Column(String(100), nullable=True)
     external_reference = Column(String(100), nullable=True, index=True) 
 
     # Wallet relationships 
@@ -70,6 +70,20 @@ class Transaction(Base):
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
     completed_at = Column(DateTime(timezone=True), nullable=True)
 
+    # Newest-first history per user, as listed by the transactions endpoint
+    __table_args__ = (
+        Index('ix_transactions_user_created', user_id, created_at.desc()),
+        # Only ever looked up by equality; a hash index is smaller than a B-tree
+        Index('ix_transactions_reference', reference, postgresql_using='hash'),
+        # Transfer debit/credit rows share a reference; deposit references are unique
+        Index(
+            'ix_transactions_deposit_reference',
+            reference,
+            unique=True,
+            postgresql_where=text("transaction_type = 'DEPOSIT'"),
+        ),
+    )
+
     # Relationships
     user = relationship("User", backref="transactions")
     source_wallet = relationship("Wallet", foreign_keys=[source_wallet_id], backref="sent_transactions")
@@ -80,7 +94,6 @@ class Transaction(Base):
         Mark transaction as completed with timestamp.
         """
         self.status = TransactionStatus.COMPLETED
-        from datetime import timezone
         self.completed_at = datetime.now(timezone.utc)
 
     def mark_failed(self, reason: str = None) -> None:
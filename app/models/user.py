@@ -3,6 +3,7 @@
 import uuid
 from sqlalchemy import Column, String, DateTime
 from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 
 from app.db.base import Base
@@ -23,3 +24,10 @@ class User(Base):
     name = Column(String, nullable=True)
     picture = Column(String, nullable=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    # One-to-one wallet and one-to-many API keys
+    wallet = relationship("Wallet", back_populates="user", uselist=False)
+    api_keys = relationship("APIKey", back_populates="user", order_by="APIKey.created_at.desc()")
+
+    # Fetch server-generated created_at on INSERT so no refresh is needed
+    __mapper_args__ = {"eager_defaults": True}
@@ -27,7 +27,7 @@ class Wallet(Base):
     created_at = Column(DateTime(timezone=True), server_default=func.now())
 
     # One-to-one relationship with User
-    user = relationship("User", backref="wallet", uselist=False)
+    user = relationship("User", back_populates="wallet")
 
     def has_sufficient_balance(self, amount: Decimal) -> bool:
         """
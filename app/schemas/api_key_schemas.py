@@ -3,7 +3,7 @@ from datetime import datetime
 from typing import List, Optional
 from uuid import UUID
 
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict
 
 
 class APIKeyBase(BaseModel):
@@ -25,6 +25,8 @@ class APIKeyRollover(BaseModel):
 
 class APIKeyResponse(BaseModel):
     """Schema for API key response."""
+    model_config = ConfigDict(from_attributes=True)
+
     id: UUID
     name: str
     permissions: List[str]
@@ -4,7 +4,7 @@ from datetime import datetime
 from typing import Optional
 from uuid import UUID
 
-from pydantic import BaseModel, EmailStr
+from pydantic import BaseModel, ConfigDict, EmailStr
 
 
 class UserBase(BaseModel):
@@ -33,6 +33,8 @@ class UserInDB(UserBase):
 
 class UserResponse(UserBase):
     """Schema for user response to client."""
+    model_config = ConfigDict(from_attributes=True)
+
     id: UUID
     google_sub: str
     created_at: datetime
@@ -1,8 +1,11 @@
 from datetime import datetime
 from decimal import Decimal
 from typing import List, Optional
+from uuid import UUID
 
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict
+
+from app.models.transaction import TransactionStatus, TransactionType
 
 
 class DepositRequest(BaseModel):
@@ -49,18 +52,17 @@ class TransferResponse(BaseModel):
 
 class TransactionResponse(BaseModel):
     """Response model for transaction details."""
-    id: str
-    user_id: str
-    transaction_type: str
-    amount: str
+    model_config = ConfigDict(from_attributes=True)
+
+    id: UUID
+    user_id: UUID
+    transaction_type: TransactionType
+    amount: Decimal
     description: Optional[str] = None
-    status: str
+    status: TransactionStatus
     reference: Optional[str] = None
     created_at: datetime
 
-    class Config:
-        from_attributes = True
-
 
 class TransactionHistoryResponse(BaseModel):
     """Response model for transaction history."""
@@ -1,20 +1,94 @@
 
+import asyncio
 import logging
-from typing import List, Optional
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
 from uuid import UUID
 
 from fastapi import HTTPException, status
+from sqlalchemy import case, func, update
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
-
-from app.core.security import generate_api_key, hash_api_key, verify_api_key
+from sqlalchemy.orm import joinedload
+
+from app.core.config import settings
+from app.core.security import (
+    compute_key_lookup,
+    generate_api_key,
+    hash_api_key,
+    is_legacy_api_key_hash,
+    is_well_formed_api_key,
+    verify_api_key,
+)
+from app.db.session import AsyncSessionLocal
 from app.models.api_key import APIKey
 from app.models.user import User
-from app.utils.expiry import parse_expiry, validate_expiry_format
+from app.utils.expiry import parse_expiry
 
 
 logger = logging.getLogger(__name__)
 
+# last_used_at values waiting to be written: api_key_id -> last use time
+LAST_USED_FLUSH_INTERVAL = 10
+_pending_last_used: Dict[UUID, datetime] = {}
+_last_used_lock = asyncio.Lock()
+
+
+def _requeue_last_used(pending: Dict[UUID, datetime]) -> None:
+    """Put unwritten timestamps back, keeping any newer ones buffered since."""
+    for key_id, used_at in pending.items():
+        _pending_last_used.setdefault(key_id, used_at)
+
+
+async def flush_last_used() -> None:
+    """
+    Write buffered last_used_at timestamps in a single UPDATE.
+
+    On any failure (including the database being unreachable) or
+    cancellation the timestamps are put back so the next flush retries them.
+    """
+    global _pending_last_used
+
+    async with _last_used_lock:
+        if not _pending_last_used:
+            return
+
+        pending, _pending_last_used = _pending_last_used, {}
+
+        try:
+            async with AsyncSessionLocal() as db:
+                await db.execute(
+                    update(APIKey)
+                    .where(APIKey.id.in_(pending))
+                    .values(last_used_at=case(pending, value=APIKey.id))
+                    .execution_options(synchronize_session=False)
+                )
+                await db.commit()
+        except asyncio.CancelledError:
+            _requeue_last_used(pending)
+            raise
+        except Exception:
+            logger.exception("Failed to flush last_used_at for %d API keys", len(pending))
+            _requeue_last_used(pending)
+
+
+async def run_last_used_flusher(interval: float = LAST_USED_FLUSH_INTERVAL) -> None:
+    """
+    Flush buffered last_used_at timestamps every interval seconds.
+
+    Runs until cancelled; meant to be started as a task in the app lifespan.
+
+    Args:
+        interval: Seconds between flushes.
+    """
+    while True:
+        await asyncio.sleep(interval)
+        # Keep the task alive whatever goes wrong; the next tick retries
+        try:
+            await flush_last_used()
+        except Exception:
+            logger.exception("last_used_at flush failed")
+
 
 class APIKeyService:
     """Service class for API key operations."""
@@ -33,17 +107,17 @@ class APIKeyService:
         Returns:
             int: Number of active (non-revoked, non-expired) API keys.
         """
-        from datetime import datetime, timezone
         # Use timezone-aware UTC time for consistent comparison
         now = datetime.now(timezone.utc)
-        result = await db.execute(
-            select(APIKey).where(
+        return await db.scalar(
+            select(func.count())
+            .select_from(APIKey)
+            .where(
                 APIKey.user_id == user_id,
                 APIKey.revoked == False,
                 APIKey.expires_at > now
             )
         )
-        return len(result.scalars().all())
 
     @staticmethod
     async def create_api_key(
@@ -69,11 +143,13 @@ class APIKeyService:
         Raises:
             HTTPException: If user exceeds max active keys or invalid expiry.
         """
-        # Validate expiry format
-        if not validate_expiry_format(expiry):
+        # Validate and parse expiry in one pass
+        try:
+            expires_at = parse_expiry(expiry)
+        except ValueError as e:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Invalid expiry format. Use: 1H, 2D, 3M, 4Y"
+                detail=str(e)
             )
 
         # Check max active keys limit
@@ -88,14 +164,12 @@ class APIKeyService:
         plain_key = generate_api_key()
         hashed_key = hash_api_key(plain_key)
 
-        # Parse expiry to datetime
-        expires_at = parse_expiry(expiry)
-
         # Create API key record
         api_key = APIKey(
             user_id=user_id,
             name=name,
             hashed_key=hashed_key,
+            key_lookup=compute_key_lookup(plain_key),
             permissions=permissions,
             expires_at=expires_at
         )
@@ -104,7 +178,7 @@ class APIKeyService:
         await db.commit()
         await db.refresh(api_key)
 
-        logger.info(f"Created API key for user {user_id}: {api_key.id}")
+        logger.info("Created API key for user %s: %s", user_id, api_key.id)
         return api_key, plain_key
 
     @staticmethod
@@ -129,21 +203,22 @@ class APIKeyService:
         Raises:
             HTTPException: If expired key not found, not owned by user, or not truly expired.
         """
-        # Validate expiry format
-        if not validate_expiry_format(expiry):
+        # Validate and parse expiry in one pass
+        try:
+            expires_at = parse_expiry(expiry)
+        except ValueError as e:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Invalid expiry format. Use: 1H, 2D, 3M, 4Y"
+                detail=str(e)
             )
 
         # Find the expired key
-        result = await db.execute(
+        expired_key = await db.scalar(
             select(APIKey).where(
                 APIKey.id == expired_key_id,
                 APIKey.user_id == user_id
             )
         )
-        expired_key = result.scalars().first()
 
         if not expired_key:
             raise HTTPException(
@@ -170,14 +245,12 @@ class APIKeyService:
         plain_key = generate_api_key()
         hashed_key = hash_api_key(plain_key)
 
-        # Parse expiry to datetime
-        expires_at = parse_expiry(expiry)
-
         # Create new API key with same permissions
         new_key = APIKey(
             user_id=user_id,
             name=f"{expired_key.name} (rolled over)",
             hashed_key=hashed_key,
+            key_lookup=compute_key_lookup(plain_key),
             permissions=expired_key.permissions,  # Reuse permissions
             expires_at=expires_at
         )
@@ -186,7 +259,10 @@ class APIKeyService:
         await db.commit()
         await db.refresh(new_key)
 
-        logger.info(f"Rolled over API key for user {user_id}: {expired_key.id} -> {new_key.id}")
+        logger.info(
+            "Rolled over API key for user %s: %s -> %s",
+            user_id, expired_key.id, new_key.id,
+        )
         return new_key, plain_key
 
     @staticmethod
@@ -209,13 +285,12 @@ class APIKeyService:
         Raises:
             HTTPException: If key not found or not owned by user.
         """
-        result = await db.execute(
+        api_key = await db.scalar(
             select(APIKey).where(
                 APIKey.id == key_id,
                 APIKey.user_id == user_id
             )
         )
-        api_key = result.scalars().first()
 
         if not api_key:
             raise HTTPException(
@@ -226,7 +301,7 @@ class APIKeyService:
         if not api_key.revoked:
             api_key.revoke()
             await db.commit()
-            logger.info(f"Revoked API key {key_id} for user {user_id}")
+            logger.info("Revoked API key %s for user %s", key_id, user_id)
 
         return api_key
 
@@ -255,6 +330,11 @@ class APIKeyService:
         """
         Validate an API key and return associated key and user.
 
+        Keys created before key_lookup existed are found by verifying their
+        Argon2 hashes one by one, bounded by LEGACY_API_KEY_SCAN_LIMIT, and
+        backfilled on first use. Once no active key has a NULL key_lookup,
+        set LEGACY_API_KEY_FALLBACK_UNTIL to switch that path off.
+
         Args:
             api_key: The plain API key to validate.
             db: Database session.
@@ -262,34 +342,66 @@ class APIKeyService:
         Returns:
             tuple: (APIKey object or None, User object or None)
         """
-        from datetime import datetime
-
-        from datetime import timezone
-
-        # Find the API key by matching hash
         now = datetime.now(timezone.utc)
-        result = await db.execute(
-            select(APIKey).where(
-                APIKey.revoked == False,
-                APIKey.expires_at > now
-            )
+        key_lookup = compute_key_lookup(api_key)
+        key_obj = None
+        backfilled = False
+
+        # Active keys, loaded together with their user and wallet
+        active_keys = (
+            select(APIKey)
+            .options(joinedload(APIKey.user).joinedload(User.wallet))
+            .where(APIKey.revoked == False, APIKey.expires_at > now)
         )
-        api_keys = result.scalars().all()
-
-        # Check each key's hash
-        for key_obj in api_keys:
-            if verify_api_key(api_key, key_obj.hashed_key):
-                # Update last used timestamp
-                key_obj.last_used_at = datetime.now(timezone.utc)
-
-                # Get the user
-                user_result = await db.execute(
-                    select(User).where(User.id == key_obj.user_id)
-                )
-                user = user_result.scalars().first()
 
-                await db.commit()
-                logger.info(f"Validated API key for user {user.id if user else 'unknown'}")
-                return key_obj, user
-
-        return None, None
+        # Find the single candidate by its lookup digest, then verify once
+        candidate = await db.scalar(active_keys.where(APIKey.key_lookup == key_lookup))
+        if candidate and verify_api_key(api_key, candidate.hashed_key):
+            key_obj = candidate
+
+        if (
+            key_obj is None
+            and settings.legacy_api_key_fallback_enabled(now.date())
+            and is_well_formed_api_key(api_key)
+        ):
+            # Legacy keys without a lookup digest: each check is a full Argon2
+            # verify, so only the newest few are tried
+            scan_limit = settings.legacy_api_key_scan_limit
+            result = await db.execute(
+                active_keys.where(APIKey.key_lookup.is_(None))
+                .order_by(APIKey.created_at.desc())
+                .limit(scan_limit)
+            )
+            candidates = result.scalars().all()
+            for candidate in candidates:
+                if verify_api_key(api_key, candidate.hashed_key):
+                    # Backfill so the next request takes the direct lookup
+                    candidate.key_lookup = key_lookup
+                    key_obj = candidate
+                    backfilled = True
+                    break
+            else:
+                if len(candidates) == scan_limit:
+                    logger.warning(
+                        "Legacy API key scan hit its limit of %d keys; older "
+                        "legacy keys can't be validated until rotated",
+                        scan_limit,
+                    )
+
+        if key_obj is None:
+            return None, None
+
+        if is_legacy_api_key_hash(key_obj.hashed_key):
+            # Replace the Argon2 hash now that the plain key has been verified
+            key_obj.hashed_key = hash_api_key(api_key)
+            backfilled = True
+
+        # Record last use; written in batches by run_last_used_flusher
+        _pending_last_used[key_obj.id] = now
+
+        user = key_obj.user
+
+        if backfilled:
+            await db.commit()
+        logger.info("Validated API key for user %s", user.id if user else 'unknown')
+        return key_obj, user
@@ -1,13 +1,16 @@
 
 
 import logging
-import uuid
+import secrets
 from decimal import Decimal
 from typing import Dict, Any, Optional
 
+from sqlalchemy import func, update
+from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
 
-from app.core.paystack import get_paystack_client
+from app.core.paystack import PaystackError, get_paystack_client
 from app.models.transaction import Transaction, TransactionType, TransactionStatus
 from app.models.user import User
 from app.models.wallet import Wallet
@@ -30,7 +33,7 @@ class PaystackService:
         """
         Generate a unique transaction reference for Paystack.
 
-        Format: user_id + timestamp + random_uuid
+        Format: user_id + random suffix, capped at 50 characters
 
         Args:
             user_id: User ID for reference generation.
@@ -38,15 +41,8 @@ class PaystackService:
         Returns:
             str: Unique transaction reference.
         """
-        timestamp = str(int(uuid.uuid1().time))
-        random_part = str(uuid.uuid4())[:8]
-        reference = f"{user_id}_{timestamp}_{random_part}"
-
-        
-        if len(reference) > 50:
-            reference = reference[:50]
-
-        return reference
+        # 12 URL-safe characters (72 random bits) fit after a 36-char UUID
+        return f"{user_id}_{secrets.token_urlsafe(9)}"[:50]
 
     @staticmethod
     def convert_naira_to_kobo(amount: Decimal) -> int:
@@ -59,7 +55,7 @@ class PaystackService:
         Returns:
             int: Amount in kobo.
         """
-        return int(amount * 100) 
+        return int(amount.scaleb(2))
 
     @staticmethod
     def convert_kobo_to_naira(amount: int) -> Decimal:
@@ -72,7 +68,7 @@ class PaystackService:
         Returns:
             Decimal: Amount in Naira.
         """
-        return Decimal(amount) / 100
+        return Decimal(amount).scaleb(-2)
 
     @staticmethod
     async def initialize_deposit(
@@ -94,16 +90,17 @@ class PaystackService:
             Dict: Paystack initialization response with authorization URL.
 
         Raises:
-            Exception: If validation fails or Paystack error occurs.
+            ValueError: If the amount is invalid or below the minimum.
+            PaystackError: If Paystack initialization fails.
         """
         # Validate amount
         if not validate_wallet_amount(amount):
-            raise Exception("Invalid deposit amount")
+            raise ValueError("Invalid deposit amount")
 
         # Check minimum deposit amount
         min_deposit = Decimal('50.00')
         if amount < min_deposit:
-            raise Exception(f"Minimum deposit amount is ₦{min_deposit}")
+            raise ValueError(f"Minimum deposit amount is ₦{min_deposit}")
 
         # Generate unique reference
         reference = PaystackService.generate_transaction_reference(str(user.id))
@@ -145,10 +142,10 @@ class PaystackService:
                 }
             )
 
-            logger.info(f"Initialized Paystack deposit for user {user.id}: ref {reference}")
+            logger.info("Initialized Paystack deposit for user %s: ref %s", user.id, reference)
             return paystack_response
 
-        except Exception as e:
+        except PaystackError as e:
             # Mark transaction as failed if Paystack initialization fails
             transaction.status = TransactionStatus.FAILED
             transaction.transaction_metadata = {
@@ -157,8 +154,8 @@ class PaystackService:
             }
             await db.commit()
 
-            logger.error(f"Failed to initialize Paystack deposit for user {user.id}: {e}")
-            raise Exception(f"Deposit initialization failed: {str(e)}")
+            logger.error("Failed to initialize Paystack deposit for user %s: %s", user.id, e)
+            raise PaystackError(f"Deposit initialization failed: {str(e)}")
 
     @staticmethod
     async def verify_deposit_transaction(
@@ -183,7 +180,7 @@ class PaystackService:
         verification_response = await paystack_client.verify_transaction(reference)
 
         # Log verification (webhook will handle the actual processing)
-        logger.info(f"Verified Paystack transaction: {reference}")
+        logger.info("Verified Paystack transaction: %s", reference)
         return verification_response
 
     @staticmethod
@@ -194,6 +191,9 @@ class PaystackService:
         """
         Process Paystack webhook for deposit completion.
 
+        Only PENDING deposits are credited; the status change, the wallet
+        credit and the metadata update are committed together, so repeated
+        deliveries of the same event credit the wallet once.
 
         Args:
             webhook_data: Webhook payload from Paystack.
@@ -208,7 +208,7 @@ class PaystackService:
 
         # Only process charge.success events
         if event != "charge.success":
-            logger.info(f"Ignoring webhook event: {event}")
+            logger.info("Ignoring webhook event: %s", event)
             return True
 
         # Extract transaction reference
@@ -217,72 +217,86 @@ class PaystackService:
             logger.error("Webhook missing transaction reference")
             return False
 
-        # Find our transaction by reference
-        from sqlalchemy.future import select
-
-        result = await db.execute(
-            select(Transaction).where(Transaction.reference == reference)
+        # Paystack sends the amount in kobo, as an integer
+        paystack_amount = data.get("amount")
+        if not isinstance(paystack_amount, int):
+            logger.error("Webhook for %s has invalid amount: %r", reference, paystack_amount)
+            return False
+        paystack_amount_naira = PaystackService.convert_kobo_to_naira(paystack_amount)
+
+        # Claim the pending deposit atomically: concurrent deliveries of the
+        # same event block on the row lock and then match nothing
+        transaction = await db.scalar(
+            update(Transaction)
+            .where(
+                Transaction.reference == reference,
+                Transaction.transaction_type == TransactionType.DEPOSIT,
+                Transaction.status == TransactionStatus.PENDING
+            )
+            .values(status=TransactionStatus.COMPLETED, completed_at=func.now())
+            .returning(Transaction)
+            .execution_options(populate_existing=True)
         )
-        transaction = result.scalars().first()
 
         if not transaction:
-            logger.error(f"Transaction not found for reference: {reference}")
-            return False
-        
-
-        # Check if already processed 
-        if transaction.status == TransactionStatus.COMPLETED:
-            logger.info(f"Transaction {reference} already processed")
+            existing = await PaystackService.get_transaction_by_reference(reference, db)
+            if not existing:
+                logger.error("Transaction not found for reference: %s", reference)
+                return False
+            logger.info("Transaction %s already processed (%s)", reference, existing.status.value)
             return True
 
         # Verify transaction details
-        paystack_amount_kobo = data.get("amount")
-        paystack_amount_naira = PaystackService.convert_kobo_to_naira(paystack_amount_kobo)
-
         if paystack_amount_naira != transaction.amount:
-            logger.error(f"Amount mismatch for transaction {reference}: expected {transaction.amount}, got {paystack_amount_naira}")
+            logger.error(
+                "Amount mismatch for transaction %s: expected %s, got %s",
+                reference, transaction.amount, paystack_amount_naira,
+            )
             transaction.status = TransactionStatus.FAILED
+            transaction.completed_at = None
             transaction.transaction_metadata = {
-                **transaction.transaction_metadata,
+                **(transaction.transaction_metadata or {}),
                 "failure_reason": "Amount mismatch",
                 "webhook_data": webhook_data
             }
             await db.commit()
             return False
 
-        # Find user's wallet
-        result = await db.execute(
-            select(Wallet).where(Wallet.user_id == transaction.user_id)
-        )
-        wallet = result.scalars().first()
-
-        if not wallet:
-            logger.error(f"Wallet not found for user {transaction.user_id}")
-            transaction.status = TransactionStatus.FAILED
-            await db.commit()
-            return False
-
-        # Credit wallet balance
+        # Credit the owner's wallet in the same database transaction
         try:
-            wallet.credit_balance(transaction.amount)
-            transaction.mark_completed()
+            wallet_number = await db.scalar(
+                update(Wallet)
+                .where(Wallet.user_id == transaction.user_id)
+                .values(balance=Wallet.balance + transaction.amount)
+                .returning(Wallet.wallet_number)
+            )
+
+            if not wallet_number:
+                logger.error("Wallet not found for user %s", transaction.user_id)
+                transaction.status = TransactionStatus.FAILED
+                transaction.completed_at = None
+                await db.commit()
+                return False
 
             # Update metadata with webhook data
             transaction.transaction_metadata = {
-                **transaction.transaction_metadata,
+                **(transaction.transaction_metadata or {}),
                 "webhook_processed": True,
                 "paystack_data": data
             }
 
             await db.commit()
 
-            logger.info(f"Successfully processed deposit webhook for {reference}: credited ₦{transaction.amount} to wallet {wallet.wallet_number}")
+            logger.info(
+                "Successfully processed deposit webhook for %s: credited ₦%s to wallet %s",
+                reference, transaction.amount, wallet_number,
+            )
             return True
 
-        except Exception as e:
-            logger.error(f"Failed to credit wallet for transaction {reference}: {e}")
-            transaction.status = TransactionStatus.FAILED
-            await db.commit()
+        except SQLAlchemyError as e:
+            # Rolled back: the deposit stays PENDING and can be retried
+            await db.rollback()
+            logger.error("Failed to credit wallet for transaction %s: %s", reference, e)
             return False
 
     @staticmethod
@@ -300,12 +314,9 @@ class PaystackService:
         Returns:
             Optional[Transaction]: Transaction if found.
         """
-        from sqlalchemy.future import select
-
-        result = await db.execute(
+        return await db.scalar(
             select(Transaction).where(Transaction.id == transaction_id)
         )
-        return result.scalars().first()
 
     @staticmethod
     async def get_transaction_by_reference(
@@ -322,9 +333,6 @@ class PaystackService:
         Returns:
             Optional[Transaction]: Transaction if found.
         """
-        from sqlalchemy.future import select
-
-        result = await db.execute(
+        return await db.scalar(
             select(Transaction).where(Transaction.reference == reference)
         )
-        return result.scalars().first()
@@ -1,9 +1,12 @@
 
 
 import logging
+import secrets
 from decimal import Decimal
 from typing import Optional
 
+from sqlalchemy import func, update
+from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
 
@@ -37,10 +40,9 @@ class TransferService:
         Returns:
             Optional[Wallet]: Recipient's wallet if found, None otherwise.
         """
-        result = await db.execute(
+        return await db.scalar(
             select(Wallet).where(Wallet.wallet_number == recipient_wallet_number)
         )
-        return result.scalars().first()
 
     @staticmethod
     async def create_transfer_transaction(
@@ -53,6 +55,9 @@ class TransferService:
         """
         Create debit and credit transactions for a transfer.
 
+        The transactions are added to the session but not committed; the
+        caller commits them together with the balance changes.
+
         Args:
             sender_wallet: Sender's wallet.
             recipient_wallet: Recipient's wallet.
@@ -64,8 +69,7 @@ class TransferService:
             Tuple of (debit_transaction, credit_transaction).
         """
         # Generate unique reference for the transfer
-        import uuid
-        transfer_reference = f"transfer_{uuid.uuid4().hex[:16]}"
+        transfer_reference = f"transfer_{secrets.token_hex(8)}"
 
         # Create debit transaction (sender)
         debit_transaction = Transaction(
@@ -99,11 +103,7 @@ class TransferService:
             }
         )
 
-        db.add(debit_transaction)
-        db.add(credit_transaction)
-        await db.commit()
-        await db.refresh(debit_transaction)
-        await db.refresh(credit_transaction)
+        db.add_all([debit_transaction, credit_transaction])
 
         return debit_transaction, credit_transaction
 
@@ -118,6 +118,11 @@ class TransferService:
         """
         Execute wallet transfer with atomic balance updates.
 
+        Balances are changed with conditional UPDATEs (the debit only
+        applies while balance >= amount), issued in wallet id order so
+        opposite transfers can't deadlock; the transactions and balance
+        changes are then committed together.
+
         Args:
             sender_wallet: Sender's wallet.
             recipient_wallet: Recipient's wallet.
@@ -129,24 +134,54 @@ class TransferService:
             TransferResponse: Transfer completion details.
 
         Raises:
-            Exception: If transfer validation fails or execution fails.
+            ValueError: If transfer validation fails.
+            SQLAlchemyError: If the transfer could not be recorded.
         """
-        logger.info(f"Transfer request: {sender_wallet.wallet_number} → {recipient_wallet.wallet_number}, ₦{amount}")
+        logger.info(
+            "Transfer request: %s → %s, ₦%s",
+            sender_wallet.wallet_number, recipient_wallet.wallet_number, amount,
+        )
 
         # Validate amount
         if not validate_wallet_amount(amount):
-            raise Exception("Invalid transfer amount")
+            raise ValueError("Invalid transfer amount")
 
         if amount <= Decimal('0'):
-            raise Exception("Transfer amount must be greater than zero")
+            raise ValueError("Transfer amount must be greater than zero")
 
         if amount > sender_wallet.balance:
-            raise Exception(f"Insufficient balance. Available: ₦{sender_wallet.balance}")
+            raise ValueError(f"Insufficient balance. Available: ₦{sender_wallet.balance}")
 
         if sender_wallet.id == recipient_wallet.id:
-            raise Exception("Cannot transfer to your own wallet")
+            raise ValueError("Cannot transfer to your own wallet")
 
         try:
+            debit = (
+                update(Wallet)
+                .where(Wallet.id == sender_wallet.id, Wallet.balance >= amount)
+                .values(balance=Wallet.balance - amount)
+                .returning(Wallet.id)
+                .execution_options(synchronize_session="fetch")
+            )
+            credit = (
+                update(Wallet)
+                .where(Wallet.id == recipient_wallet.id)
+                .values(balance=Wallet.balance + amount)
+                .execution_options(synchronize_session="fetch")
+            )
+
+            # Update rows in id order so concurrent transfers lock consistently
+            if sender_wallet.id < recipient_wallet.id:
+                debited = (await db.execute(debit)).first()
+                if debited:
+                    await db.execute(credit)
+            else:
+                await db.execute(credit)
+                debited = (await db.execute(debit)).first()
+
+            if not debited:
+                raise ValueError("Insufficient balance")
+
             # Create transfer transactions
             debit_transaction, credit_transaction = await TransferService.create_transfer_transaction(
                 sender_wallet=sender_wallet,
@@ -156,18 +191,17 @@ class TransferService:
                 db=db
             )
 
-            # Execute the transfer
-            sender_wallet.debit_balance(amount)
-            recipient_wallet.credit_balance(amount)
-
             # Mark transactions as completed
             debit_transaction.mark_completed()
             credit_transaction.mark_completed()
 
-            # Note: Let the FastAPI dependency handle commit/rollback
-            logger.info(f"Transfer completed: {sender_wallet.wallet_number} sent ₦{amount} to {recipient_wallet.wallet_number}")
+            await db.commit()
+            logger.info(
+                "Transfer completed: %s sent ₦%s to %s",
+                sender_wallet.wallet_number, amount, recipient_wallet.wallet_number,
+            )
 
-            return TransferResponse(
+            return TransferResponse.model_construct(
                 transaction_id=str(debit_transaction.id),
                 sender_wallet=sender_wallet.wallet_number,
                 recipient_wallet=recipient_wallet.wallet_number,
@@ -176,9 +210,10 @@ class TransferService:
                 message=f"Successfully transferred ₦{amount} to {recipient_wallet.wallet_number}"
             )
 
-        except Exception as e:
-            logger.error(f"Transfer failed: {e}")
-            raise Exception(f"Transfer failed: {str(e)}")
+        except (ValueError, SQLAlchemyError) as e:
+            await db.rollback()
+            logger.error("Transfer failed: %s", e)
+            raise
 
     @staticmethod
     async def get_user_transactions(
@@ -200,10 +235,11 @@ class TransferService:
             Tuple of (total_count, list_of_transactions).
         """
         # Get total count
-        count_result = await db.execute(
-            select(Transaction).where(Transaction.user_id == user_id)
+        total = await db.scalar(
+            select(func.count())
+            .select_from(Transaction)
+            .where(Transaction.user_id == user_id)
         )
-        total = len(count_result.scalars().all())
 
         # Get transactions with pagination
         result = await db.execute(
@@ -1,9 +1,64 @@
 
-import re
-from datetime import datetime, timedelta
+import calendar
+from datetime import datetime, timedelta, timezone
 from typing import Optional
 
-from dateutil.relativedelta import relativedelta
+
+def _add_months(dt: datetime, months: int) -> datetime:
+    """
+    Add whole calendar months, clamping the day to the target month's end.
+
+    Args:
+        dt: Starting datetime.
+        months: Number of months to add.
+
+    Returns:
+        datetime: Shifted datetime.
+    """
+    month_index = dt.month - 1 + months
+    year, month = dt.year + month_index // 12, month_index % 12 + 1
+    day = min(dt.day, calendar.monthrange(year, month)[1])
+    return dt.replace(year=year, month=month, day=day)
+
+
+# Expiry unit -> function adding that many units to a datetime
+_UNIT_OFFSETS = {
+    'H': lambda dt, n: dt + timedelta(hours=n),
+    'D': lambda dt, n: dt + timedelta(days=n),
+    'M': _add_months,
+    'Y': lambda dt, n: _add_months(dt, 12 * n),
+}
+
+# Longest accepted amount; far beyond any real expiry, and keeps int()
+# away from CPython's 4300-digit conversion limit
+MAX_EXPIRY_DIGITS = 6
+
+# Expiry unit -> display name, for get_expiry_description
+_UNIT_SINGULAR = {'H': 'hour', 'D': 'day', 'M': 'month', 'Y': 'year'}
+_UNIT_PLURAL = {unit: name + 's' for unit, name in _UNIT_SINGULAR.items()}
+
+
+def _split_expiry(expiry: Optional[str]) -> Optional[tuple[int, str]]:
+    """
+    Split an expiry string like 1H, 30D, 6M or 2Y (case insensitive).
+
+    Args:
+        expiry: Expiry format string.
+
+    Returns:
+        Optional[tuple[int, str]]: (amount, upper-case unit), or None if invalid.
+    """
+    if not expiry:
+        return None
+
+    digits, unit = expiry[:-1], expiry[-1].upper()
+    if unit not in _UNIT_OFFSETS or len(digits) > MAX_EXPIRY_DIGITS:
+        return None
+    # isascii() keeps out other Unicode digits that int() would accept
+    if not (digits.isascii() and digits.isdigit()):
+        return None
+
+    return int(digits), unit
 
 
 def parse_expiry(expiry: str) -> datetime:
@@ -17,31 +72,20 @@ def parse_expiry(expiry: str) -> datetime:
         datetime: Expiry datetime in UTC.
 
     Raises:
-        ValueError: If expiry format is invalid.
+        ValueError: If expiry format is invalid or the date is out of range.
     """
     if not expiry:
         raise ValueError("Expiry string cannot be empty")
 
-    # Match pattern like 1H, 30D, 6M, 2Y (case insensitive)
-    match = re.match(r'^(\d+)([HD MY])$', expiry.upper())
-    if not match:
+    parts = _split_expiry(expiry)
+    if parts is None:
         raise ValueError("Invalid expiry format. Use: 1H, 2D, 3M, 4Y")
 
-    amount = int(match.group(1))
-    unit = match.group(2).upper()
-
-    now = datetime.utcnow()
-
-    if unit == 'H':
-        return now + timedelta(hours=amount)
-    elif unit == 'D':
-        return now + timedelta(days=amount)
-    elif unit == 'M':
-        return now + relativedelta(months=amount)
-    elif unit == 'Y':
-        return now + relativedelta(years=amount)
-    else:
-        raise ValueError(f"Unsupported expiry unit: {unit}")
+    amount, unit = parts
+    try:
+        return _UNIT_OFFSETS[unit](datetime.now(timezone.utc), amount)
+    except (OverflowError, ValueError):
+        raise ValueError("Expiry is too far in the future")
 
 
 def validate_expiry_format(expiry: str) -> bool:
@@ -54,11 +98,7 @@ def validate_expiry_format(expiry: str) -> bool:
     Returns:
         bool: True if format is valid.
     """
-    try:
-        parse_expiry(expiry)
-        return True
-    except ValueError:
-        return False
+    return _split_expiry(expiry) is not None
 
 
 def get_expiry_description(expiry: str) -> str:
@@ -74,18 +114,11 @@ def get_expiry_description(expiry: str) -> str:
     Raises:
         ValueError: If expiry format is invalid.
     """
-    match = re.match(r'^(\d+)([HD MY])$', expiry.upper())
-    if not match:
+    parts = _split_expiry(expiry)
+    if parts is None:
         raise ValueError("Invalid expiry format")
 
-    amount = int(match.group(1))
-    unit = match.group(2).upper()
-
-    unit_names = {
-        'H': 'hour' if amount == 1 else 'hours',
-        'D': 'day' if amount == 1 else 'days',
-        'M': 'month' if amount == 1 else 'months',
-        'Y': 'year' if amount == 1 else 'years'
-    }
+    amount, unit = parts
+    unit_names = _UNIT_SINGULAR if amount == 1 else _UNIT_PLURAL
 
     return f"{amount} {unit_names[unit]}"
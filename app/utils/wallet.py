@@ -1,46 +1,72 @@
 
-
-import random
-import string
+import base64
+import secrets
+import uuid
 from decimal import Decimal
 
+from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
 
 from app.models.wallet import Wallet
 
 
-async def generate_unique_wallet_number(db: AsyncSession) -> str:
+# Transaction amount bounds (Naira)
+MAX_TRANSACTION_AMOUNT = Decimal('1000000.00')  # 1 million
+_CENT = Decimal('0.01')
+
+
+def generate_wallet_number() -> str:
     """
-    Generate a unique 10-character wallet number.
+    Generate a random 9-character wallet number candidate.
 
-    Format: WAL + 6 random alphanumeric characters
-    Example: WAL12A3B4C
+    Format: WAL + 6 random base32 characters (A-Z, 2-7)
+    Example: WAL2A3B4C
+
+    Returns:
+        str: Wallet number (uniqueness is enforced on insert).
+    """
+    # 4 CSPRNG bytes give 6 full base32 characters (30 random bits)
+    chars = base64.b32encode(secrets.token_bytes(4))[:6].decode('ascii')
+    return f"WAL{chars}"
+
+
+async def create_user_wallet(db: AsyncSession, user_id: uuid.UUID) -> Wallet:
+    """
+    Create a wallet for a user with a unique wallet number.
+
+    Uses INSERT ... ON CONFLICT DO NOTHING RETURNING so uniqueness is checked
+    by the database in the same round-trip as the insert, via the unique
+    indexes on wallet_number and user_id. Only a collision (empty RETURNING)
+    costs another attempt. The caller commits.
 
     Args:
-        db: Database session for uniqueness check.
+        db: Database session.
+        user_id: Owner of the new wallet.
 
     Returns:
-        str: Unique wallet number.
+        Wallet: The created wallet, or the user's existing wallet if one was
+        created concurrently.
+
+    Raises:
+        ValueError: If no unique wallet number could be generated.
     """
     max_attempts = 100  # Prevent infinite loop
-    attempts = 0
 
-    while attempts < max_attempts:
-        # Generate 6 random alphanumeric characters
-        chars = ''.join(random.choices(string.ascii_uppercase + string.digits, k=6))
-        wallet_number = f"WAL{chars}"
-
-        # Check if wallet number already exists
-        result = await db.execute(
-            select(Wallet).where(Wallet.wallet_number == wallet_number)
+    for _ in range(max_attempts):
+        wallet = await db.scalar(
+            insert(Wallet)
+            .values(user_id=user_id, wallet_number=generate_wallet_number())
+            .on_conflict_do_nothing()
+            .returning(Wallet)
         )
-        existing_wallet = result.scalars().first()
-
-        if not existing_wallet:
-            return wallet_number
+        if wallet:
+            return wallet
 
-        attempts += 1
+        # The conflict may be on user_id rather than wallet_number
+        existing_wallet = await db.scalar(select(Wallet).where(Wallet.user_id == user_id))
+        if existing_wallet:
+            return existing_wallet
 
     # Fallback if we can't generate a unique number
     raise ValueError("Unable to generate unique wallet number after maximum attempts")
@@ -70,16 +96,10 @@ def validate_wallet_amount(amount: Decimal) -> bool:
         bool: True if amount is valid for transactions.
     """
     # Must be positive and not too large
-    if amount <= 0:
-        return False
-
-    # Maximum transaction amount (adjust as needed)
-    max_amount = Decimal('1000000.00')  # 1 million
-    if amount > max_amount:
-        return False
-
-    # Check decimal places (max 2)
-    if amount.quantize(Decimal('0.01')) != amount:
+    if amount <= 0 or amount > MAX_TRANSACTION_AMOUNT:
         return False
 
-    return True
+    # Check decimal places (max 2); trailing zeros like 1.500 still count as 2
+    if amount.as_tuple().exponent >= -2:
+        return True
+    return amount.quantize(_CENT) == amount
@@ -1,16 +1,25 @@
 
+import os
 
 import uvicorn
 
+from app.core.config import settings
+
 
 def main():
     """Main entry point to run the application."""
+    # The file watcher only makes sense locally, and uvicorn can't combine
+    # it with multiple workers
+    reload = settings.environment.lower() == "development"
     uvicorn.run(
         "app.main:create_app",
         factory=True,
         host="0.0.0.0",
         port=8000,
-        reload=True,
+        loop="uvloop",
+        http="httptools",
+        reload=reload,
+        workers=None if reload else int(os.getenv("WEB_CONCURRENCY", "1")),
     )
 
 
@@ -0,0 +1,112 @@
+"""Initial schema
+
+The schema exactly as the original init_db() created it. Existing
+deployments whose tables already exist should run ``alembic stamp 0001``
+once, then ``alembic upgrade head`` to apply the later revisions.
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-15
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+revision: str = "0001"
+down_revision: Union[str, None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+transaction_type = postgresql.ENUM(
+    "DEPOSIT", "WITHDRAWAL", "TRANSFER", "FEE", "REFUND", name="transactiontype"
+)
+transaction_status = postgresql.ENUM(
+    "PENDING", "COMPLETED", "FAILED", "CANCELLED", name="transactionstatus"
+)
+
+
+def upgrade() -> None:
+    op.create_table(
+        "users",
+        sa.Column("id", postgresql.UUID(as_uuid=True), primary_key=True),
+        sa.Column("google_sub", sa.String(), nullable=False),
+        sa.Column("email", sa.String(), nullable=False),
+        sa.Column("name", sa.String(), nullable=True),
+        sa.Column("picture", sa.String(), nullable=True),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+    )
+    op.create_index("ix_users_id", "users", ["id"])
+    op.create_index("ix_users_google_sub", "users", ["google_sub"], unique=True)
+    op.create_index("ix_users_email", "users", ["email"])
+
+    op.create_table(
+        "wallets",
+        sa.Column("id", postgresql.UUID(as_uuid=True), primary_key=True),
+        sa.Column("user_id", postgresql.UUID(as_uuid=True), sa.ForeignKey("users.id"), nullable=False),
+        sa.Column("wallet_number", sa.String(10), nullable=False),
+        sa.Column("balance", sa.Numeric(precision=15, scale=2), nullable=False),
+        sa.Column("is_active", sa.Boolean(), nullable=False),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+    )
+    op.create_index("ix_wallets_id", "wallets", ["id"])
+    op.create_index("ix_wallets_user_id", "wallets", ["user_id"], unique=True)
+    op.create_index("ix_wallets_wallet_number", "wallets", ["wallet_number"], unique=True)
+
+    op.create_table(
+        "api_keys",
+        sa.Column("id", postgresql.UUID(as_uuid=True), primary_key=True),
+        sa.Column("user_id", postgresql.UUID(as_uuid=True), sa.ForeignKey("users.id"), nullable=False),
+        sa.Column("name", sa.String(), nullable=False),
+        sa.Column("hashed_key", sa.String(), nullable=False),
+        sa.Column("permissions", sa.JSON(), nullable=False),
+        sa.Column("expires_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("revoked", sa.Boolean(), nullable=False),
+        sa.Column("revoked_at", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("last_used_at", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+    )
+    op.create_index("ix_api_keys_id", "api_keys", ["id"])
+    op.create_index("ix_api_keys_user_id", "api_keys", ["user_id"])
+    op.create_index("ix_api_keys_hashed_key", "api_keys", ["hashed_key"], unique=True)
+    op.create_index("ix_api_keys_user_not_revoked", "api_keys", ["user_id", "revoked"])
+    op.create_index("ix_api_keys_expires_at", "api_keys", ["expires_at"])
+
+    op.create_table(
+        "transactions",
+        sa.Column("id", postgresql.UUID(as_uuid=True), primary_key=True),
+        sa.Column("user_id", postgresql.UUID(as_uuid=True), sa.ForeignKey("users.id"), nullable=False),
+        sa.Column("transaction_type", transaction_type, nullable=False),
+        sa.Column("amount", sa.Numeric(precision=15, scale=2), nullable=False),
+        sa.Column("description", sa.String(255), nullable=True),
+        sa.Column("status", transaction_status, nullable=False),
+        sa.Column("reference", sa.String(100), nullable=True),
+        sa.Column("external_reference", sa.String(100), nullable=True),
+        sa.Column("source_wallet_id", postgresql.UUID(as_uuid=True), sa.ForeignKey("wallets.id"), nullable=True),
+        sa.Column("destination_wallet_id", postgresql.UUID(as_uuid=True), sa.ForeignKey("wallets.id"), nullable=True),
+        sa.Column("fee_amount", sa.Numeric(precision=10, scale=2), nullable=False),
+        sa.Column("transaction_metadata", sa.JSON(), nullable=True),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+        sa.Column("updated_at", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("completed_at", sa.DateTime(timezone=True), nullable=True),
+    )
+    op.create_index("ix_transactions_id", "transactions", ["id"])
+    op.create_index("ix_transactions_user_id", "transactions", ["user_id"])
+    op.create_index("ix_transactions_transaction_type", "transactions", ["transaction_type"])
+    op.create_index("ix_transactions_status", "transactions", ["status"])
+    op.create_index("ix_transactions_reference", "transactions", ["reference"])
+    op.create_index("ix_transactions_external_reference", "transactions", ["external_reference"])
+    op.create_index("ix_transactions_source_wallet_id", "transactions", ["source_wallet_id"])
+    op.create_index("ix_transactions_destination_wallet_id", "transactions", ["destination_wallet_id"])
+
+
+def downgrade() -> None:
+    op.drop_table("transactions")
+    op.drop_table("api_keys")
+    op.drop_table("wallets")
+    op.drop_table("users")
+    transaction_status.drop(op.get_bind(), checkfirst=True)
+    transaction_type.drop(op.get_bind(), checkfirst=True)
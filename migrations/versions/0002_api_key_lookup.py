@@ -0,0 +1,34 @@
+"""Direct-lookup digest column on api_keys
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-15
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = "0002"
+down_revision: Union[str, None] = "0001"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Nullable: keys created before this column are backfilled on first use
+    op.add_column("api_keys", sa.Column("key_lookup", sa.String(64), nullable=True))
+    op.create_index("ix_api_keys_key_lookup", "api_keys", ["key_lookup"], unique=True)
+    op.create_index(
+        "ix_api_keys_active_lookup",
+        "api_keys",
+        ["key_lookup"],
+        postgresql_where=sa.text("revoked = false"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_api_keys_active_lookup", table_name="api_keys")
+    op.drop_index("ix_api_keys_key_lookup", table_name="api_keys")
+    op.drop_column("api_keys", "key_lookup")
@@ -0,0 +1,35 @@
+"""Composite indexes for per-user key counts and transaction history
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-15
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = "0003"
+down_revision: Union[str, None] = "0002"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # (user_id, revoked) is a prefix of the new index
+    op.drop_index("ix_api_keys_user_not_revoked", table_name="api_keys")
+    op.create_index(
+        "ix_api_keys_user_active", "api_keys", ["user_id", "revoked", "expires_at"]
+    )
+    op.create_index(
+        "ix_transactions_user_created",
+        "transactions",
+        ["user_id", sa.text("created_at DESC")],
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_transactions_user_created", table_name="transactions")
+    op.drop_index("ix_api_keys_user_active", table_name="api_keys")
+    op.create_index("ix_api_keys_user_not_revoked", "api_keys", ["user_id", "revoked"])
@@ -0,0 +1,30 @@
+"""Unique index on deposit references
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-15
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = "0004"
+down_revision: Union[str, None] = "0003"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        "ix_transactions_deposit_reference",
+        "transactions",
+        ["reference"],
+        unique=True,
+        postgresql_where=sa.text("transaction_type = 'DEPOSIT'"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_transactions_deposit_reference", table_name="transactions")
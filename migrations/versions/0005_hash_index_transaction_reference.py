@@ -0,0 +1,38 @@
+"""Hash index on transactions.reference
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-15
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+revision: str = "0005"
+down_revision: Union[str, None] = "0004"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Build the new index without blocking writes, then swap it in
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_transactions_reference_hash",
+            "transactions",
+            ["reference"],
+            postgresql_using="hash",
+            postgresql_concurrently=True,
+        )
+        op.drop_index(
+            "ix_transactions_reference",
+            table_name="transactions",
+            postgresql_concurrently=True,
+        )
+    op.execute("ALTER INDEX ix_transactions_reference_hash RENAME TO ix_transactions_reference")
+
+
+def downgrade() -> None:
+    op.drop_index("ix_transactions_reference", table_name="transactions")
+    op.create_index("ix_transactions_reference", "transactions", ["reference"])